@@ -0,0 +1 @@
+"""Headless benchmarks of the Streamlit pages (see :mod:`benchmarks.pages`)."""
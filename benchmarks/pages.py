@@ -0,0 +1,265 @@
+"""Per-page latency benchmarks at several catalog sizes.
+
+Usage::
+
+    python -m benchmarks.pages run                          # 3k, 30k and 300k films
+    python -m benchmarks.pages run --sizes 3000 30000 --out benchmarks/results/today.json
+    python -m benchmarks.pages run --sizes 3000 --compare benchmarks/results/baseline.json
+    python -m benchmarks.pages compare baseline.json today.json --threshold 0.2
+
+For every size, source CSVs from :mod:`cinema.synthetic` are written to a
+scratch directory, the catalogs are parsed and the model artifacts built
+(``catalog_parse`` and ``similarity_build``, as ``python -m cinema.build``
+would), then each page script runs headlessly against
+:mod:`benchmarks.stub`:
+
+* ``cold_start``: first run with empty in-memory caches (a fresh server
+  process, artifacts already on disk), ``rerun``: the same run warm
+* ``search_keystroke``, ``filter_change``, ``afficher_plus`` (Film)
+* ``recommend`` (first ranking of a film), ``afficher_plus``,
+  ``filter_change`` (Recommendation)
+* ``random_draw``, ``filter_change`` (Découverte aléatoire)
+* ``section_change`` (Rapport d'analyse)
+
+Each scenario is repeated ``--repeat`` times and the median kept, with
+the bytes the run would send to the browser. ``compare`` flags the steps
+slower than the baseline by more than ``--threshold`` (and
+``--min-delta`` seconds) and exits with status 1 if there are any.
+"""
+import argparse
+import json
+import os
+import platform
+import runpy
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks import stub as stub_module
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(REPO_ROOT, "pages")
+REPORT_PDF = "Analyse_Power_BI_Project_2.pdf"
+
+DEFAULT_SIZES = (3000, 30000, 300000)
+MAX_RERUNS = 5
+
+
+def scenarios(title, genre):
+    """``{page: [(step, widget values, clicked buttons), ...]}`` for a catalog whose first film is ``title``."""
+    search = {"search_query_0": title}
+    return {
+        "2_Film": [
+            ("cold_start", {}, ()),
+            ("rerun", {}, ()),
+            ("search_keystroke", {"search_input": title[:4]}, ()),
+            ("filter_change", {"Genre :": [genre]}, ()),
+            ("afficher_plus", {"Genre :": [genre]}, ("unique_key_afficher_plus",)),
+        ],
+        "3_Recommendation": [
+            ("cold_start", {}, ()),
+            ("rerun", {}, ()),
+            ("recommend", search, ("start_button",)),
+            ("afficher_plus", search, ("Afficher plus",)),
+            ("filter_change", dict(search, **{"Genre :": [genre]}), ()),
+        ],
+        "4_Découverte_aléatoire": [
+            ("cold_start", {}, ()),
+            ("rerun", {}, ()),
+            ("random_draw", {}, ("random_button",)),
+            ("filter_change", {"Filtrer par genre": [genre]}, ("random_button",)),
+        ],
+        "5_Rapport d'analyse": [
+            ("cold_start", {}, ()),
+            ("rerun", {}, ()),
+            ("section_change", {"Section :": "La place des femmes dans le cinéma"}, ()),
+        ],
+    }
+
+
+def run_script(st, path, values, clicks):
+    """Run a page like Streamlit does, following ``st.experimental_rerun``; returns ``(seconds, bytes)``."""
+    st.values = dict(values)
+    st.clicks = set(clicks)
+    st.payload_bytes = 0
+    start = time.perf_counter()
+    for _ in range(MAX_RERUNS):
+        try:
+            runpy.run_path(path, run_name="__main__")
+            break
+        except stub_module.Rerun:
+            # Comme dans Streamlit, un bouton n'est « cliqué » que pendant une exécution.
+            st.clicks = set()
+            st.payload_bytes = 0
+    return time.perf_counter() - start, st.payload_bytes
+
+
+def prepare(workdir, n, seed):
+    """Write the source CSVs and the report PDF link for a catalog of ``n`` films."""
+    import pandas as pd
+
+    from cinema import catalog, synthetic
+
+    paths = synthetic.write_catalogs(os.path.join(workdir, catalog.DATA_DIR), n, seed)
+    pdf = os.path.join(REPO_ROOT, REPORT_PDF)
+    if os.path.exists(pdf):
+        os.symlink(pdf, os.path.join(workdir, REPORT_PDF))
+    os.makedirs(os.path.join(workdir, "posters"), exist_ok=True)
+    first = pd.read_csv(paths["ml"], nrows=1).iloc[0]
+    return first["title"], first["genres"].split(",")[0]
+
+
+def bench_size(st, n, repeat=3, workers=1, seed=0, pages=None):
+    """Timings of every scenario for a catalog of ``n`` films."""
+    from cinema import build, catalog
+
+    workdir = tempfile.mkdtemp(prefix=f"mgc-bench-{n}-")
+    cwd = os.getcwd()
+    try:
+        title, genre = prepare(workdir, n, seed)
+        os.chdir(workdir)
+        # Pas de réseau : les affiches manquantes retombent sur l'URL TMDB.
+        os.environ["MGC_POSTER_SOURCE_DIR"] = os.path.join(workdir, "posters")
+
+        result = {"catalog_parse": {}, "similarity_build": {}, "steps": {}}
+        for name in sorted(catalog.SOURCES):
+            start = time.perf_counter()
+            catalog.load(name)
+            result["catalog_parse"][name] = time.perf_counter() - start
+            start = time.perf_counter()
+            build.build(name, workers=workers)
+            result["similarity_build"][name] = time.perf_counter() - start
+
+        for page, steps in scenarios(title, genre).items():
+            if pages and page not in pages:
+                continue
+            path = os.path.join(PAGES_DIR, f"{page}.py")
+            runs = {step: [] for step, _, _ in steps}
+            payloads = {}
+            for _ in range(repeat):
+                st.reset()
+                for step, values, clicks in steps:
+                    seconds, payload = run_script(st, path, values, clicks)
+                    runs[step].append(seconds)
+                    payloads[step] = payload
+            for step, _, _ in steps:
+                result["steps"][f"{page}:{step}"] = {
+                    "seconds": statistics.median(runs[step]),
+                    "runs": runs[step],
+                    "bytes": payloads[step],
+                }
+        return result
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(sizes=DEFAULT_SIZES, repeat=3, workers=1, seed=0, pages=None, progress=print):
+    st = stub_module.install()
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    import numpy
+    import pandas
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "workers": workers,
+        },
+        "sizes": {},
+    }
+    for n in sizes:
+        start = time.perf_counter()
+        results["sizes"][str(n)] = bench_size(st, n, repeat=repeat, workers=workers, seed=seed, pages=pages)
+        progress(f"{n} films: {time.perf_counter() - start:.1f}s")
+    return results
+
+
+def compare(baseline, current, threshold=0.2, min_delta=0.005):
+    """``(lines, regressions)``: one report line per common step, and the regressed ones."""
+    lines, regressions = [], []
+    for size, steps in current["sizes"].items():
+        base_steps = baseline["sizes"].get(size)
+        if base_steps is None:
+            continue
+        timings = {f"{kind}:{name}": seconds for kind in ("catalog_parse", "similarity_build")
+                   for name, seconds in steps[kind].items()}
+        timings.update({step: timing["seconds"] for step, timing in steps["steps"].items()})
+        base_timings = {f"{kind}:{name}": seconds for kind in ("catalog_parse", "similarity_build")
+                        for name, seconds in base_steps[kind].items()}
+        base_timings.update({step: timing["seconds"] for step, timing in base_steps["steps"].items()})
+        for step, seconds in timings.items():
+            if step not in base_timings:
+                continue
+            before = base_timings[step]
+            ratio = seconds / before if before else float("inf")
+            regressed = ratio > 1 + threshold and seconds - before > min_delta
+            flag = "REGRESSION" if regressed else ""
+            lines.append(f"{size:>8} {step:<45} {before * 1e3:10.1f}ms {seconds * 1e3:10.1f}ms {ratio:6.2f}x {flag}")
+            if regressed:
+                regressions.append((size, step, before, seconds))
+    return lines, regressions
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _report(baseline, current, args):
+    lines, regressions = compare(baseline, current, args.threshold, args.min_delta)
+    print(f"{'films':>8} {'step':<45} {'baseline':>12} {'current':>12}")
+    print("\n".join(lines))
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pages", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write a JSON result file")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="catalog sizes (films)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per scenario, the median is kept")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for the model build")
+    run_parser.add_argument("--seed", type=int, default=0, help="synthetic catalog seed")
+    run_parser.add_argument("--pages", nargs="+", help="only these pages (e.g. 2_Film)")
+    run_parser.add_argument("--out", default=os.path.join("benchmarks", "results", "latest.json"))
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare the results with this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--threshold", type=float, default=0.2, help="relative slowdown flagged as a regression")
+        sub.add_argument("--min-delta", type=float, default=0.005, help="ignore slowdowns below this many seconds")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        return _report(_load(args.baseline), _load(args.current), args)
+
+    results = run(args.sizes, repeat=args.repeat, workers=args.workers, seed=args.seed, pages=args.pages,
+                  progress=lambda message: print(message, file=sys.stderr))
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"results -> {args.out}", file=sys.stderr)
+    for size, timings in results["sizes"].items():
+        for step, timing in timings["steps"].items():
+            print(f"{size:>8} {step:<45} {timing['seconds'] * 1e3:10.1f}ms {timing['bytes']:>10} B")
+    if args.compare:
+        return _report(_load(args.compare), results, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Minimal stand-in for the ``streamlit`` module.
+
+Page scripts run unchanged against it: widgets return the values set by
+the benchmark scenario (looked up by ``key``, then by label), buttons are
+"clicked" for one run, ``st.experimental_rerun`` raises :class:`Rerun`,
+and ``st.cache_resource`` is a plain per-function dictionary whose misses
+are timed. Rendering calls only count the bytes that would be sent to the
+browser.
+"""
+import functools
+import sys
+import time
+import types
+
+
+class Rerun(Exception):
+    """Raised by ``st.experimental_rerun``; the runner starts the script again."""
+
+
+class SessionState(dict):
+    """``st.session_state``: a dict that also allows attribute access."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+
+class Container:
+    """``st.sidebar``, columns and expanders: forwards every call to the module."""
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class StreamlitStub(types.ModuleType):
+
+    def __init__(self):
+        super().__init__("streamlit")
+        self.session_state = SessionState()
+        self.sidebar = Container(self)
+        self.values = {}
+        self.clicks = set()
+        self.payload_bytes = 0
+        self.cache_misses = {}
+        self._caches = []
+
+    # ------------------------------------------------------------------ runner
+    def reset(self):
+        """Forget the session state and every cached resource (cold start)."""
+        self.session_state.clear()
+        for cache in self._caches:
+            cache.clear()
+        self.cache_misses = {}
+
+    def _value(self, label, key, default):
+        if key is not None and key in self.values:
+            return self.values[key]
+        return self.values.get(label, default)
+
+    def _emit(self, body):
+        self.payload_bytes += len(body) if isinstance(body, (str, bytes)) else 0
+
+    # ----------------------------------------------------------------- caching
+    def cache_resource(self, func=None, **options):
+        if func is None:
+            return lambda f: self.cache_resource(f, **options)
+        cache = {}
+        self._caches.append(cache)
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            if key not in cache:
+                start = time.perf_counter()
+                cache[key] = func(*args, **kwargs)
+                self.cache_misses[name] = self.cache_misses.get(name, 0.0) + time.perf_counter() - start
+            return cache[key]
+
+        wrapper.clear = cache.clear
+        return wrapper
+
+    cache_data = cache_resource
+
+    # ---------------------------------------------------------------- elements
+    def set_page_config(self, **kwargs):
+        pass
+
+    def markdown(self, body, unsafe_allow_html=False, **kwargs):
+        self._emit(body)
+
+    def write(self, *args, **kwargs):
+        for arg in args:
+            self._emit(str(arg))
+
+    caption = title = header = subheader = markdown
+
+    def image(self, image, *args, **kwargs):
+        self._emit(image if isinstance(image, (str, bytes)) else b"")
+
+    def columns(self, spec, **kwargs):
+        return [Container(self) for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+    def expander(self, label, expanded=False):
+        return Container(self)
+
+    def spinner(self, text=""):
+        return Container(self)
+
+    def experimental_rerun(self):
+        raise Rerun()
+
+    rerun = experimental_rerun
+
+    # ----------------------------------------------------------------- widgets
+    def button(self, label, key=None, **kwargs):
+        return (key if key is not None else label) in self.clicks
+
+    def text_input(self, label, value="", key=None, **kwargs):
+        return self._value(label, key, value)
+
+    def selectbox(self, label, options, index=0, format_func=str, key=None, **kwargs):
+        options = list(options)
+        value = self._value(label, key, None)
+        if value in options:
+            return value
+        return options[index] if options and index is not None else None
+
+    radio = selectbox
+
+    def multiselect(self, label, options, default=None, format_func=str, key=None, **kwargs):
+        options = list(options)
+        return [value for value in self._value(label, key, default or []) if value in options]
+
+    def slider(self, label, min_value=None, max_value=None, value=None, step=None, key=None, **kwargs):
+        return self._value(label, key, value)
+
+    def number_input(self, label, min_value=None, max_value=None, value=0, step=None, key=None, **kwargs):
+        return self._value(label, key, value)
+
+
+def install():
+    """Put a :class:`StreamlitStub` in ``sys.modules["streamlit"]`` and return it.
+
+    Must run before anything imports :mod:`cinema.resources`.
+    """
+    stub = sys.modules.get("streamlit")
+    if not isinstance(stub, StreamlitStub):
+        if "cinema.resources" in sys.modules:
+            raise RuntimeError("cinema.resources was imported with the real streamlit")
+        stub = sys.modules["streamlit"] = StreamlitStub()
+    return stub
@@ -0,0 +1 @@
+"""Shared data and recommendation helpers for the MGC Cinéma pages."""
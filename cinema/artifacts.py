@@ -0,0 +1,154 @@
+"""Versioned on-disk artifacts of the recommendation model.
+
+Layout, per catalog::
+
+    Data_base/artifacts/<catalog>/
+        CURRENT              name of the active version directory
+        v0001/
+            manifest.json    source fingerprint, shapes, genre/studio names, title trigrams
+            vocabulary.json  CountVectorizer vocabulary (token -> column)
+            features_{data,indices,indptr}.npy   L2-normalized CSR matrix
+            neighbors.npy, scores.npy            top-K neighbour index
+            genre_bits.npy, studio_{indptr,indices}.npy, rating.npy, year.npy
+            title_{keys,key_offsets,rows}.npy    sorted folded titles
+            title_gram_{indptr,rows,counts}.npy  trigram postings
+
+Arrays are plain ``.npy`` files opened with ``np.load(mmap_mode="r")``:
+loading is a file open, and every worker process shares the same pages.
+"""
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+from scipy import sparse
+
+from cinema.catalog import DATA_DIR
+from cinema.neighbors import NeighborIndex
+
+ARTIFACTS_DIR = os.path.join(DATA_DIR, "artifacts")
+FORMAT_VERSION = 2
+
+FILTER_ARRAYS = ("genre_bits", "studio_indptr", "studio_indices", "rating", "year")
+TITLE_ARRAYS = ("title_keys", "title_key_offsets", "title_rows", "title_gram_indptr", "title_gram_rows",
+                "title_gram_counts")
+
+_VERSION_DIR = re.compile(r"^v(\d+)$")
+
+
+class Artifacts:
+    """A loaded (memory-mapped) artifact version."""
+
+    def __init__(self, path, manifest, vocabulary, features, neighbors, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.vocabulary = vocabulary
+        self.features = features
+        self.neighbors = neighbors
+        self.arrays = arrays
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+
+def catalog_dir(name, root=ARTIFACTS_DIR):
+    return os.path.join(root, name)
+
+
+def current_version(name, root=ARTIFACTS_DIR):
+    """Name of the active version directory of ``name``, or None if never built."""
+    try:
+        with open(os.path.join(catalog_dir(name, root), "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def versions(name, root=ARTIFACTS_DIR):
+    """Existing version directories, oldest first."""
+    try:
+        entries = os.listdir(catalog_dir(name, root))
+    except FileNotFoundError:
+        return []
+    return sorted((e for e in entries if _VERSION_DIR.match(e)), key=lambda e: int(e[1:]))
+
+
+def next_version(name, root=ARTIFACTS_DIR):
+    existing = versions(name, root)
+    return f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+
+
+def _save(path, array):
+    np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+
+
+def write(name, manifest, vocabulary, features, neighbors, arrays, root=ARTIFACTS_DIR, keep=3):
+    """Write a new version of ``name`` and make it current.
+
+    The version is written to a temporary directory and renamed, then
+    ``CURRENT`` is replaced atomically: readers never see a partial build.
+    Only the ``keep`` most recent versions are kept on disk.
+    """
+    base = catalog_dir(name, root)
+    os.makedirs(base, exist_ok=True)
+    version = next_version(name, root)
+    tmp = os.path.join(base, f".{version}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    features = features.tocsr()
+    # Même dtype pour indices et indptr, sinon scipy recopie tout au chargement.
+    index_dtype = np.int32 if features.nnz < 2**31 else np.int64
+    _save(os.path.join(tmp, "features_data.npy"), features.data.astype(np.float32))
+    _save(os.path.join(tmp, "features_indices.npy"), features.indices.astype(index_dtype))
+    _save(os.path.join(tmp, "features_indptr.npy"), features.indptr.astype(index_dtype))
+    _save(os.path.join(tmp, "neighbors.npy"), neighbors.neighbors)
+    _save(os.path.join(tmp, "scores.npy"), neighbors.scores)
+    for key in FILTER_ARRAYS + TITLE_ARRAYS:
+        if key in arrays:
+            _save(os.path.join(tmp, f"{key}.npy"), arrays[key])
+
+    manifest = dict(manifest, version=version, format=FORMAT_VERSION,
+                    n_rows=features.shape[0], n_features=features.shape[1], k=neighbors.k)
+    with open(os.path.join(tmp, "vocabulary.json"), "w") as f:
+        json.dump(vocabulary, f, ensure_ascii=False)
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    os.rename(tmp, os.path.join(base, version))
+    pointer = os.path.join(base, "CURRENT.tmp")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(base, "CURRENT"))
+
+    for old in versions(name, root)[:-keep]:
+        shutil.rmtree(os.path.join(base, old), ignore_errors=True)
+    return version
+
+
+def load(name, version=None, root=ARTIFACTS_DIR):
+    """Memory-map ``version`` (default: current) of ``name``, or None if absent."""
+    version = version or current_version(name, root)
+    if version is None:
+        return None
+    path = os.path.join(catalog_dir(name, root), version)
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        return None
+    with open(os.path.join(path, "vocabulary.json")) as f:
+        vocabulary = json.load(f)
+
+    def mmap(key):
+        return np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")
+
+    features = sparse.csr_matrix(
+        (mmap("features_data"), mmap("features_indices"), mmap("features_indptr")),
+        shape=(manifest["n_rows"], manifest["n_features"]),
+        copy=False,
+    )
+    neighbors = NeighborIndex(mmap("neighbors"), mmap("scores"))
+    arrays = {key: mmap(key) for key in FILTER_ARRAYS + TITLE_ARRAYS if os.path.exists(os.path.join(path, f"{key}.npy"))}
+    return Artifacts(path, manifest, vocabulary, features, neighbors, arrays)
@@ -0,0 +1,56 @@
+"""Packed film bitsets and their popcounts.
+
+A set of films is stored as ``np.packbits`` of its boolean mask, padded
+to a whole number of uint64 words. Counting the films of a set among a
+mask is then an AND and a popcount over ``N / 8`` bytes.
+"""
+import numpy as np
+
+# Masques du popcount SWAR sur 64 bits (NumPy < 2, sans np.bitwise_count).
+_M1, _M2, _M4, _H01 = (np.uint64(m) for m in (0x5555555555555555, 0x3333333333333333,
+                                               0x0F0F0F0F0F0F0F0F, 0x0101010101010101))
+
+
+def n_bytes(n):
+    """Bytes of a packed bitset of ``n`` films."""
+    return -(-n // 64) * 8
+
+
+def pack(mask):
+    """Packed bitset of a boolean ``mask``."""
+    packed = np.zeros(n_bytes(len(mask)), dtype=np.uint8)
+    bits = np.packbits(mask)
+    packed[:len(bits)] = bits
+    return packed
+
+
+def pack_rows(n, row_lists):
+    """``(len(row_lists), n_bytes(n))`` bitsets, one per array of film rows."""
+    packed = np.zeros((len(row_lists), n_bytes(n)), dtype=np.uint8)
+    for i, rows in enumerate(row_lists):
+        mask = np.zeros(n, dtype=bool)
+        mask[rows] = True
+        bits = np.packbits(mask)
+        packed[i, :len(bits)] = bits
+    return packed
+
+
+def popcounts(sets, packed):
+    """Number of films of each bitset of ``sets`` also in the bitset ``packed``."""
+    words = (sets & packed).view(np.uint64)
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    # Bits à 1 par paire, quartet puis octet, sommés dans l'octet de poids fort ; en place.
+    half = words >> np.uint64(1)
+    half &= _M1
+    words -= half
+    half = words >> np.uint64(2)
+    half &= _M2
+    words &= _M2
+    words += half
+    half = words >> np.uint64(4)
+    words += half
+    words &= _M4
+    words *= _H01
+    words >>= np.uint64(56)
+    return words.sum(axis=1, dtype=np.int64)
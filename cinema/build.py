@@ -0,0 +1,124 @@
+"""Offline build of the recommendation artifacts.
+
+Usage::
+
+    python -m cinema.build                 # every catalog of cinema.catalog.SOURCES
+    python -m cinema.build ml --k 200      # one catalog, 200 neighbours per film
+    python -m cinema.build --workers 8 --memory-mb 2048
+    python -m cinema.build ml --incremental --grow-vocabulary 100
+
+Fits the ``CountVectorizer``, builds the neighbour index and the filter
+arrays, and writes them as a new artifact version (see
+:mod:`cinema.artifacts`). The app memory-maps the current version at
+startup instead of fitting anything itself.
+"""
+import argparse
+import os
+import sys
+import time
+
+from sklearn.feature_extraction.text import CountVectorizer
+
+from cinema import artifacts, catalog, incremental
+from cinema.filters import FilterIndex
+from cinema.neighbors import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_K,
+    block_size_for,
+    build_neighbor_index,
+    normalize_features,
+)
+from cinema.search import TitleIndex
+
+
+def fit_features(texts, vocabulary=None):
+    """Vectorize ``texts``; returns ``(normalized features, vocabulary)``."""
+    cv = CountVectorizer(vocabulary=vocabulary)
+    count_matrix = cv.fit_transform(texts)
+    vocabulary = {token: int(column) for token, column in cv.vocabulary_.items()}
+    return normalize_features(count_matrix), vocabulary
+
+
+def build_model(df, k=DEFAULT_K, block_size=None, workers=1, progress=None):
+    """``(features, vocabulary, neighbors)`` of a cleaned catalog frame.
+
+    Without ``block_size``, blocks are sized from the available memory.
+    """
+    features, vocabulary = fit_features(df["combined_features"])
+    neighbors = build_neighbor_index(features, k=k, block_size=block_size, workers=workers, progress=progress)
+    return features, vocabulary, neighbors
+
+
+def build(name, k=DEFAULT_K, block_size=None, workers=1, progress=None,
+          root=artifacts.ARTIFACTS_DIR, keep=3):
+    """Build and publish a new artifact version of catalog ``name``."""
+    df = catalog.load(name, features=True)
+    features, vocabulary, neighbors = build_model(df, k=k, block_size=block_size, workers=workers,
+                                                  progress=progress)
+    filters = FilterIndex.from_catalog(df)
+    titles = TitleIndex.from_titles(df["title"])
+    manifest = {
+        "catalog": name,
+        "source": catalog.SOURCES[name]["path"],
+        "source_version": catalog.version(name),
+        "keys_digest": catalog.keys_digest(df, name),
+        "genre_names": filters.genre_names,
+        "studio_names": filters.studio_names,
+        "title_grams": titles.gram_names,
+    }
+    arrays = dict(filters.arrays(), **titles.arrays())
+    return artifacts.write(name, manifest, vocabulary, features, neighbors, arrays, root=root, keep=keep)
+
+
+def _progress(name, start):
+    def report(done, total):
+        elapsed = time.perf_counter() - start
+        print(f"\r{name}: {done}/{total} films ({100 * done / total:.0f}%, {elapsed:.1f}s)",
+              end="\n" if done == total else "", file=sys.stderr, flush=True)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cinema.build", description=__doc__.split("\n")[0])
+    parser.add_argument("catalogs", nargs="*", metavar="catalog", help=f"one of {sorted(catalog.SOURCES)} (default: all)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="neighbours kept per film")
+    parser.add_argument("--block-size", type=int, default=None,
+                        help=f"rows per similarity block (default: at most {DEFAULT_BLOCK_SIZE}, "
+                             "derived from --memory-mb split between the workers)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="similarity processes")
+    parser.add_argument("--memory-mb", type=int, default=None, help="memory ceiling for the similarity blocks (default: half of the available memory)")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only add the films appended to the source since the current version")
+    parser.add_argument("--grow-vocabulary", type=int, default=0, metavar="N",
+                        help="with --incremental, add at most N unseen tokens to the vocabulary")
+    parser.add_argument("--out", default=artifacts.ARTIFACTS_DIR, help="artifacts root directory")
+    parser.add_argument("--keep", type=int, default=3, help="versions kept on disk")
+    args = parser.parse_args(argv)
+    unknown = set(args.catalogs) - set(catalog.SOURCES)
+    if unknown:
+        parser.error(f"unknown catalog(s): {', '.join(sorted(unknown))}")
+
+    for name in args.catalogs or sorted(catalog.SOURCES):
+        start = time.perf_counter()
+        if args.incremental:
+            try:
+                version = incremental.update(name, max_new_terms=args.grow_vocabulary, root=args.out, keep=args.keep)
+            except incremental.RebuildRequired as e:
+                print(f"{name}: {e}", file=sys.stderr)
+                return 1
+            print(f"{name}: {version or 'up to date'} ({time.perf_counter() - start:.1f}s)")
+            continue
+        block_size = args.block_size
+        if block_size is None and args.memory_mb:
+            n_rows = len(catalog.load(name))
+            block_size = block_size_for(n_rows, args.workers, args.memory_mb * 1024 * 1024)
+        progress = None if args.quiet else _progress(name, start)
+        version = build(name, k=args.k, block_size=block_size, workers=args.workers, progress=progress,
+                        root=args.out, keep=args.keep)
+        print(f"{name}: {version} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Film catalog ingestion.
+
+The CSV exports are parsed and cleaned once, then written next to the
+source as a Parquet file. Later loads (new server process, new page) read
+the Parquet copy directly and skip all the string cleaning.
+
+The ``combined_features`` text (about half of the frame) is only read by
+the model build: :func:`load` leaves it out unless ``features=True``, so
+the frame the pages keep in memory holds just the displayed columns.
+
+Every cache built on top of a catalog is keyed by its :func:`fingerprint`
+(source path, size, mtime and :data:`SCHEMA_VERSION`), which costs one
+``os.stat`` instead of hashing the frame itself.
+"""
+import hashlib
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+DATA_DIR = "./Data_base"
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+
+# Les pages Film et Recommandation ne partent pas du même export.
+SOURCES = {
+    "films": {"path": os.path.join(DATA_DIR, "merged_data.csv"), "dedup_on": "tconst"},
+    "ml": {"path": os.path.join(DATA_DIR, "df_ML_modif.csv"), "dedup_on": "title"},
+}
+
+STUDIO_COLUMN = "production_companies_name_y"
+
+# À incrémenter dès que clean_catalog change : invalide les copies Parquet et les artefacts.
+SCHEMA_VERSION = 5
+
+
+def _string_dtype():
+    """Arrow-backed strings when pyarrow is installed, pandas strings otherwise."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "string"
+    return "string[pyarrow]"
+
+
+# Colonnes gardées en mémoire et leur type ; les autres colonnes des CSV ne sont pas lues.
+# tconst et runtimeMinutes n'existent que dans merged_data.csv ; numVotes (popularité)
+# n'est gardé que si la source le fournit.
+SCHEMA = {
+    "tconst": _string_dtype(),
+    "title": _string_dtype(),
+    "genres": "category",
+    STUDIO_COLUMN: "category",
+    "averageRating": "float32",
+    "startYear": "int16",
+    "runtimeMinutes": "int16",
+    "numVotes": "int32",
+    "poster_path_y": _string_dtype(),
+    "combined_features": _string_dtype(),
+}
+
+# Texte du modèle : lu uniquement pour construire les features (build, ajustement de secours).
+FEATURE_COLUMNS = ("combined_features",)
+
+Fingerprint = namedtuple("Fingerprint", "path size mtime_ns schema")
+
+
+def split_studios(value):
+    """``'"Pixar", Walt Disney, Pixar'`` -> ``['Pixar', 'Walt Disney']``: each studio once per film."""
+    if not isinstance(value, str):
+        return []
+    names = (name.replace('"', "").replace("'", "").strip() for name in value.split(","))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def clean_catalog(df, dedup_on):
+    """Deduplicate and normalize the columns used by the pages, then apply :data:`SCHEMA`.
+
+    ``production_companies_name_y`` becomes the cleaned ``", "``-joined
+    studio list (see :mod:`cinema.studios`).
+    """
+    df = df.drop_duplicates(subset=dedup_on, keep="first").reset_index(drop=True)
+
+    studios = df[STUDIO_COLUMN].map(split_studios)
+    df[STUDIO_COLUMN] = studios.map(", ".join)
+
+    df["genres"] = df["genres"].fillna("").astype(str).str.replace(r"\s*,\s*", ",", regex=True).str.strip(",")
+    df["startYear"] = pd.to_numeric(df["startYear"], errors="coerce").fillna(0)
+    df["averageRating"] = pd.to_numeric(df["averageRating"], errors="coerce").fillna(0.0)
+    for column in ("runtimeMinutes", "numVotes"):
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0)
+    df["poster_path_y"] = df["poster_path_y"].fillna("")
+    df["combined_features"] = df["combined_features"].fillna("")
+    return df.astype({column: dtype for column, dtype in SCHEMA.items() if column in df})
+
+
+def read_source(path):
+    """Read only the :data:`SCHEMA` columns of a source CSV."""
+    return pd.read_csv(path, usecols=lambda column: column in SCHEMA, dtype={"tconst": str, "title": str})
+
+
+def memory_report(df):
+    """Bytes used by each column of ``df`` (deep), largest first, with a total row."""
+    usage = df.memory_usage(deep=True, index=True)
+    report = pd.DataFrame({
+        "dtype": [str(df.index.dtype)] + [str(dtype) for dtype in df.dtypes],
+        "bytes": usage.to_numpy(),
+    }, index=usage.index)
+    report = report.sort_values("bytes", ascending=False)
+    report["share"] = (report["bytes"] / report["bytes"].sum()).round(3)
+    report.loc["TOTAL"] = ["", int(report["bytes"].sum()), 1.0]
+    return report
+
+
+def fingerprint(name):
+    """:class:`Fingerprint` of the current source of catalog ``name``."""
+    path = os.path.abspath(SOURCES[name]["path"])
+    stat = os.stat(path)
+    return Fingerprint(path, stat.st_size, stat.st_mtime_ns, SCHEMA_VERSION)
+
+
+def version(name):
+    """Short, hashable tag of :func:`fingerprint`, used as cache key and artifact source version."""
+    return hashlib.sha1(repr(tuple(fingerprint(name))).encode("utf-8")).hexdigest()[:16]
+
+
+def cache_path(name, tag):
+    return os.path.join(CACHE_DIR, f"{name}-{tag}.parquet")
+
+
+def _drop_stale_copies(name, keep):
+    for entry in os.listdir(CACHE_DIR):
+        if entry.startswith(f"{name}-") and entry.endswith(".parquet") and entry != os.path.basename(keep):
+            try:
+                os.remove(os.path.join(CACHE_DIR, entry))
+            except OSError:
+                pass
+
+
+def keys_digest(df, name, n_rows=None):
+    """Digest of the dedup keys of the first ``n_rows`` rows of catalog ``name``.
+
+    Lets an incremental update check that existing rows kept their ids.
+    """
+    keys = df[SOURCES[name]["dedup_on"]].iloc[:n_rows].astype(str)
+    return hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+def load(name, features=False):
+    """Return the cleaned catalog ``name`` (one of :data:`SOURCES`).
+
+    Row ids are positional (``0..N-1``) and shared by every index built
+    on top of the catalog. The :data:`FEATURE_COLUMNS` are only included
+    with ``features=True``.
+    """
+    source = SOURCES[name]
+    cached = cache_path(name, version(name))
+    if os.path.exists(cached):
+        try:
+            if features:
+                return pd.read_parquet(cached)
+            import pyarrow.parquet as pq
+
+            # Seules les colonnes affichées sont lues : le texte du modèle reste sur le disque.
+            columns = [column for column in pq.read_schema(cached).names if column not in FEATURE_COLUMNS]
+            return pd.read_parquet(cached, columns=columns)
+        except (ImportError, OSError, ValueError):
+            pass
+
+    df = clean_catalog(read_source(source["path"]), source["dedup_on"])
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(cached, index=False)
+        _drop_stale_copies(name, cached)
+    except (ImportError, OSError, ValueError):
+        # Sans pyarrow (ou en lecture seule) on garde simplement le CSV.
+        pass
+    return df if features else df.drop(columns=list(FEATURE_COLUMNS))
+
+
+def main(argv=None):
+    """``python -m cinema.catalog [name ...]``: per-column memory report."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m cinema.catalog", description="Catalog memory report.")
+    parser.add_argument("catalogs", nargs="*", metavar="catalog", help=f"one of {sorted(SOURCES)} (default: all)")
+    parser.add_argument("--raw", action="store_true", help="also report the CSV read with default dtypes")
+    parser.add_argument("--features", action="store_true", help="include the model text (build-time frame)")
+    args = parser.parse_args(argv)
+
+    for name in args.catalogs or sorted(SOURCES):
+        compact = memory_report(load(name, features=args.features))
+        print(f"== {name} ==")
+        print(compact.to_string())
+        if args.raw:
+            raw = memory_report(pd.read_csv(SOURCES[name]["path"]))
+            ratio = raw.loc["TOTAL", "bytes"] / compact.loc["TOTAL", "bytes"]
+            print(f"-- {name}, CSV with default dtypes ({ratio:.1f}x larger) --")
+            print(raw.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
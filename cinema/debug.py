@@ -0,0 +1,141 @@
+"""Opt-in debug panel with the timing spans of the current run.
+
+Shown in the sidebar only when ``MGC_METRICS`` is set (see
+:mod:`cinema.metrics`); otherwise :func:`show_metrics_panel` returns
+immediately. A second expander is the admin memory view: the size of
+every shared cache and of every live session's state, and with
+``MGC_MEMORY_BUDGET_MB`` the number of concurrent sessions an instance
+of that size can hold.
+"""
+import html
+import os
+
+import streamlit as st
+
+from cinema import metrics
+from cinema.discovery import DiscoverySampler
+from cinema.engine import Engine
+from cinema.memory import capacity, format_bytes, nbytes
+from cinema.resources import loaded_resources, poster_cache, poster_prefetcher, result_cache, session_id, session_registry
+
+
+def cache_sizes():
+    """``[(cache, entries, bytes), ...]`` of the server-wide caches held in memory."""
+    rows = [("résultats", *_entries_bytes(result_cache().stats()))]
+    for (loader, name), (size, value) in sorted(loaded_resources().items()):
+        rows.append((f"{loader}:{name}", 1, size))
+        # Caches internes des objets partagés, qui grossissent après le chargement.
+        if isinstance(value, Engine):
+            rows.append((f"candidats:{name}", *_entries_bytes(value.candidate_cache.stats())))
+        elif isinstance(value, DiscoverySampler):
+            rows.append((f"tirages:{name}", *_entries_bytes(value.buckets.stats())))
+    return rows
+
+
+def _entries_bytes(stats):
+    return stats["entries"], stats["bytes"]
+
+
+def track_session(page):
+    """Record the size of this session's state in the server-wide registry."""
+    state = {key: st.session_state[key] for key in list(st.session_state)}
+    size = nbytes(state)
+    session_registry().update(session_id(), page, size)
+    return size
+
+
+def gauges():
+    """Process RSS, the hit rates of the server-wide caches and the memory of caches and sessions."""
+    results = result_cache().stats()
+    posters = poster_cache().stats()
+    prefetch = poster_prefetcher().stats()
+    sessions = session_registry().summary()
+    return {
+        "process_rss_bytes": metrics.rss_bytes(),
+        "result_cache_entries": results["entries"],
+        "result_cache_bytes": results["bytes"],
+        "result_cache_hit_rate": round(results["hit_rate"], 4),
+        "poster_cache_bytes": posters["bytes"],
+        "poster_cache_hit_rate": round(posters["hit_rate"], 4),
+        "poster_fetched": posters["fetched"],
+        "poster_fetch_errors": posters["errors"],
+        "poster_failed_paths": posters["failed"],
+        "poster_prefetch_in_flight": prefetch["in_flight"],
+        "poster_prefetch_cancelled": prefetch["cancelled"],
+        "poster_prefetch_skipped": prefetch["skipped"],
+        "shared_cache_bytes": sum(size for _, _, size in cache_sizes()),
+        "sessions_active": sessions["sessions"],
+        "session_state_bytes": sessions["bytes"],
+        "session_state_max_bytes": sessions["max_bytes"],
+    }
+
+
+def spans_table(spans):
+    """HTML table of ``(name, seconds)`` rows, slowest first, with a total per span name."""
+    per_name = {}
+    for name, seconds in spans:
+        count, total = per_name.get(name, (0, 0.0))
+        per_name[name] = (count + 1, total + seconds)
+    rows = "".join(
+        f"<tr><td>{html.escape(name)}</td><td>{count}</td><td>{total * 1e3:.1f} ms</td></tr>"
+        for name, (count, total) in sorted(per_name.items(), key=lambda item: -item[1][1])
+    )
+    return f"<table><tr><th>span</th><th>n</th><th>temps</th></tr>{rows}</table>"
+
+
+def memory_table(rows, headers):
+    """HTML table of ``(name, count, bytes)`` rows, largest first."""
+    body = "".join(
+        f"<tr><td>{html.escape(str(name))}</td><td>{count}</td><td>{format_bytes(size)}</td></tr>"
+        for name, count, size in sorted(rows, key=lambda row: -row[2])
+    )
+    head = "".join(f"<th>{header}</th>" for header in headers)
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def show_memory_view(values):
+    """Admin view: memory of the shared caches, of the sessions, and the capacity estimate."""
+    sessions = session_registry()
+    summary = sessions.summary()
+    with st.sidebar.expander("🧠 Mémoire (admin)"):
+        st.markdown(memory_table(cache_sizes(), ("cache", "entrées", "taille")), unsafe_allow_html=True)
+        pages = {}
+        for _, page, size in sessions.sessions():
+            count, total = pages.get(page, (0, 0))
+            pages[page] = (count + 1, total + size)
+        rows = [(page, count, total) for page, (count, total) in pages.items()]
+        st.markdown(memory_table(rows, ("page", "sessions", "état")), unsafe_allow_html=True)
+        parts = [
+            f"{summary['sessions']} session(s)",
+            f"moyenne {format_bytes(summary['mean_bytes'])}",
+            f"max {format_bytes(summary['max_bytes'])}",
+        ]
+        budget_mb = os.environ.get("MGC_MEMORY_BUDGET_MB")
+        if budget_mb and values["process_rss_bytes"]:
+            # Dimensionnement prudent : chaque session supplémentaire compte comme la plus grosse.
+            fits = capacity(int(budget_mb) * 2**20, values["process_rss_bytes"], summary["max_bytes"])
+            if fits is not None:
+                parts.append(f"≈ {fits} sessions de plus dans {budget_mb} Mo")
+        st.caption(" · ".join(parts))
+
+
+def show_metrics_panel(page):
+    """Render the spans recorded during this run and export them if ``MGC_METRICS_FILE`` is set."""
+    if not metrics.enabled():
+        return
+    spans = metrics.take_run()
+    track_session(page)
+    values = gauges()
+    with st.sidebar.expander("⏱ Mesures (debug)"):
+        st.markdown(spans_table(spans), unsafe_allow_html=True)
+        parts = [
+            f"cache recommandations : {values['result_cache_hit_rate']:.0%}",
+            f"cache affiches : {values['poster_cache_hit_rate']:.0%}",
+        ]
+        if values["process_rss_bytes"]:
+            parts.insert(0, f"RSS : {values['process_rss_bytes'] / 2**20:.0f} Mo")
+        st.caption(" · ".join(parts))
+    show_memory_view(values)
+    path = os.environ.get("MGC_METRICS_FILE")
+    if path:
+        metrics.export(path, page, spans, values)
@@ -0,0 +1,125 @@
+"""Random discovery draws over precomputed filter buckets.
+
+The candidate ids of a filter combination (a "bucket") are computed once
+and shared by every session; a click then draws ``k`` positions in that
+int32 array. Draws reject the films the session has already seen, so the
+expected cost is O(k) as long as most of the bucket is still unseen, and
+no DataFrame is touched. The films seen by a session are a sorted int32
+array, 4 bytes per film in the session state.
+"""
+import numpy as np
+
+from cinema.metrics import timed
+from cinema.result_cache import ResultCache, filters_key
+
+WEIGHTINGS = ("uniform", "rating", "popularity")
+BUCKETS_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+def _contains(sorted_ids, values):
+    """Boolean mask of the ``values`` present in the sorted array ``sorted_ids``."""
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[positions] == values
+
+
+class Bucket:
+    """Candidate ids of one filter combination, with lazily built cumulative weights."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self._cumulative = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def cumulative(self, weighting, weights):
+        """Cumulative weights of the candidates, or None if they are all zero."""
+        if weighting not in self._cumulative:
+            cumulative = np.cumsum(weights[self.ids], dtype=np.float64)
+            self._cumulative[weighting] = cumulative if len(cumulative) and cumulative[-1] > 0 else None
+        return self._cumulative[weighting]
+
+
+class DiscoverySampler:
+    """Draws random films matching the sidebar filters.
+
+    ``popularity`` is an optional per-film array (e.g. vote counts); the
+    ``"rating"`` weighting uses the ratings of the filter index.
+    """
+
+    def __init__(self, filters, popularity=None, max_buckets=256, buckets_budget=BUCKETS_BUDGET_BYTES):
+        self.filters = filters
+        self.weights = {"rating": np.clip(filters.rating.astype(np.float64), 0, None)}
+        if popularity is not None:
+            # log1p : les films très populaires ne doivent pas écraser tout le tirage.
+            self.weights["popularity"] = np.log1p(np.clip(np.asarray(popularity, dtype=np.float64), 0, None))
+        self.buckets = ResultCache(max_entries=max_buckets, ttl=None, max_bytes=buckets_budget)
+
+    @property
+    def weightings(self):
+        return ("uniform",) + tuple(w for w in WEIGHTINGS[1:] if w in self.weights)
+
+    def bucket(self, genres=None, studios=None, rating_range=None):
+        """:class:`Bucket` of the films passing the filters, cached per filter combination."""
+        key = filters_key(genres, studios, rating_range)
+        return self.buckets.get_or_compute(
+            key, lambda: Bucket(np.flatnonzero(self.filters.mask(genres, studios, rating_range)).astype(np.int32))
+        )
+
+    @timed("rank.discovery")
+    def draw(self, bucket, k, rng, seen=None, weighting="uniform"):
+        """``(ids, seen)``: up to ``k`` distinct ids of ``bucket`` not in ``seen``, and ``seen`` updated.
+
+        ``seen`` is a sorted int32 array. When fewer than ``k`` unseen films
+        are left, the bucket starts over: its ids are removed from ``seen``.
+        """
+        seen = np.empty(0, dtype=np.int32) if seen is None else seen
+        cumulative = bucket.cumulative(weighting, self.weights[weighting]) if weighting != "uniform" else None
+        n = len(bucket)
+        k = min(k, n)
+        chosen = self._reject(bucket, k, rng, seen, cumulative)
+        if chosen is None:
+            unseen = bucket.ids[~_contains(seen, bucket.ids)]
+            if len(unseen) < k:
+                seen = seen[~_contains(bucket.ids, seen)]
+                unseen = bucket.ids
+            chosen = self._exact(unseen, k, rng, None if cumulative is None else self.weights[weighting])
+        return chosen, np.union1d(seen, chosen).astype(np.int32)
+
+    @staticmethod
+    def _reject(bucket, k, rng, seen, cumulative, max_rounds=8):
+        """Rejection sampling, or None when too many draws hit seen films."""
+        chosen = []
+        taken = set()
+        for _ in range(max_rounds):
+            missing = k - len(chosen)
+            if not missing:
+                break
+            # Un peu plus de tirages que nécessaire pour absorber les rejets.
+            size = 2 * missing + 4
+            if cumulative is None:
+                positions = rng.integers(0, len(bucket), size=size)
+            else:
+                positions = np.searchsorted(cumulative, rng.random(size) * cumulative[-1], side="right")
+            films = bucket.ids[positions]
+            for film in films[~_contains(seen, films)].tolist():
+                if film not in taken:
+                    taken.add(film)
+                    chosen.append(film)
+                    if len(chosen) == k:
+                        break
+        if len(chosen) < k:
+            return None
+        return np.array(chosen, dtype=np.int32)
+
+    @staticmethod
+    def _exact(ids, k, rng, weights):
+        """Draw without replacement over an explicit candidate list (slow path)."""
+        if weights is not None:
+            p = weights[ids]
+            positive = np.count_nonzero(p)
+            if positive >= k and p.sum() > 0:
+                return rng.choice(ids, size=k, replace=False, p=p / p.sum()).astype(np.int32)
+        return rng.choice(ids, size=k, replace=False).astype(np.int32)
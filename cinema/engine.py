@@ -0,0 +1,305 @@
+"""Headless recommendation engine and batch CLI.
+
+Usage::
+
+    python -m cinema.engine ml --k 20 --out recs.parquet          # every film, no filter
+    python -m cinema.engine ml --queries queries.jsonl --out recs.jsonl --workers 8
+
+Each line of a ``--queries`` file is a JSON object with ``title`` (or
+``row``) and optional ``genres``, ``studios`` and ``rating_range``, like
+the sidebar filters. Queries are grouped by filter combination and
+ranked in chunks: one sparse product of the chunk's features against the
+eligible films, reduced to its top-K with ``argpartition``, optionally
+over a process pool. Results are streamed to Parquet or JSONL in query
+order, so memory stays bounded for millions of queries.
+
+This module never imports Streamlit: the Recommendation page and the
+offline jobs share the same :class:`Engine`.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cinema import artifacts, build, catalog
+from cinema.filters import FilterIndex
+from cinema.recommend import recommend
+from cinema.result_cache import ResultCache, filters_key
+
+DEFAULT_BATCH_SIZE = 256
+# Budget des colonnes candidates (features transposées) gardées par combinaison de filtres.
+CANDIDATES_BUDGET_BYTES = 256 * 1024 * 1024
+
+Query = namedtuple("Query", "row genres studios rating_range", defaults=(None, None, None))
+
+
+def batch_top_k(features, rows, k, candidates, candidates_t):
+    """Top-``k`` of ``candidates`` for each of ``rows``, the film itself excluded.
+
+    Returns ``(ids, scores)`` of shape ``(len(rows), k)``, padded with -1
+    when fewer than ``k`` films are eligible.
+    """
+    ids = np.full((len(rows), k), -1, dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    if not len(candidates) or not k:
+        return ids, scores
+
+    block = (features[rows] @ candidates_t).toarray()
+    # Le film lui-même n'est jamais recommandé.
+    positions = np.minimum(np.searchsorted(candidates, rows), len(candidates) - 1)
+    itself = np.flatnonzero(candidates[positions] == rows)
+    block[itself, positions[itself]] = -np.inf
+
+    width = min(k, len(candidates))
+    if width < len(candidates):
+        best = np.argpartition(-block, width - 1, axis=1)[:, :width]
+    else:
+        best = np.broadcast_to(np.arange(width), (len(rows), width))
+    best_scores = np.take_along_axis(block, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best = np.take_along_axis(best, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+    valid = np.isfinite(best_scores)
+    ids[:, :width] = np.where(valid, candidates[best], -1)
+    scores[:, :width] = np.where(valid, best_scores, 0)
+    return ids, scores
+
+
+class Engine:
+    """Filter-aware recommendations over one catalog's features and neighbour index."""
+
+    def __init__(self, features, neighbors, filters, titles=None, candidates_budget=CANDIDATES_BUDGET_BYTES):
+        self.features = features
+        self.neighbors = neighbors
+        self.filters = filters
+        self.titles = None if titles is None else np.asarray(titles, dtype=object)
+        self.candidate_cache = ResultCache(max_entries=16, ttl=None, max_bytes=candidates_budget)
+
+    @classmethod
+    def load(cls, name, root=artifacts.ARTIFACTS_DIR):
+        """Engine of catalog ``name``: the current artifacts if they match the source, else a fresh fit."""
+        loaded = artifacts.load(name, root=root)
+        if (loaded is not None and loaded.manifest.get("source_version") == catalog.version(name)
+                and set(artifacts.FILTER_ARRAYS) <= set(loaded.arrays)):
+            manifest = loaded.manifest
+            filters = FilterIndex.from_arrays(manifest["genre_names"], manifest["studio_names"], loaded.arrays)
+            return cls(loaded.features, loaded.neighbors, filters, catalog.load(name)["title"])
+        df = catalog.load(name, features=True)
+        features, _, neighbors = build.build_model(df)
+        return cls(features, neighbors, FilterIndex.from_catalog(df), df["title"])
+
+    def __len__(self):
+        return self.features.shape[0]
+
+    def mask(self, genres=None, studios=None, rating_range=None):
+        return self.filters.mask(genres, studios, rating_range)
+
+    def recommend(self, row, k, genres=None, studios=None, rating_range=None):
+        """``(ids, scores)`` of the ``k`` films most similar to ``row`` passing the filters."""
+        mask = self.mask(genres, studios, rating_range)
+        return recommend(self.features, row, k, mask=mask, neighbors=self.neighbors)
+
+    def candidates(self, key):
+        """``(ids, features[ids].T)`` of the films passing the filters ``key``, cached."""
+        def compute():
+            genres, studios, rating_range = key
+            ids = np.flatnonzero(self.mask(genres, studios, rating_range)).astype(np.int32)
+            return ids, self.features[ids].T.tocsr()
+        return self.candidate_cache.get_or_compute(key, compute)
+
+    def rank(self, key, rows, k):
+        """Top-``k`` ``(ids, scores)`` arrays of ``rows`` under the filters ``key``."""
+        rows = np.asarray(rows, dtype=np.int32)
+        genres, studios, rating_range = key
+        if k <= self.neighbors.k and self.mask(genres, studios, rating_range).all():
+            # Sans filtre effectif, l'index de voisins suffit : aucun produit matriciel.
+            return (np.array(self.neighbors.neighbors[rows, :k], dtype=np.int32),
+                    np.array(self.neighbors.scores[rows, :k], dtype=np.float32))
+        ids, candidates_t = self.candidates(key)
+        return batch_top_k(self.features, rows, k, ids, candidates_t)
+
+    def recommend_batch(self, queries, k, batch_size=DEFAULT_BATCH_SIZE, workers=1):
+        """Yield ``(query, ids, scores)`` for every :class:`Query`, in input order.
+
+        Queries are read a window at a time, grouped by filter combination
+        and ranked ``batch_size`` rows per task; ``ids`` are the valid
+        recommendations only (no -1 padding).
+        """
+        window = batch_size * max(workers, 1) * 4
+        queries = iter(queries)
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(self.features, self.neighbors, self.filters))
+        try:
+            while True:
+                chunk = list(itertools.islice(queries, window))
+                if not chunk:
+                    break
+                groups = {}
+                for position, query in enumerate(chunk):
+                    key = filters_key(query.genres, query.studios, query.rating_range)
+                    groups.setdefault(key, []).append(position)
+                tasks = [
+                    (key, positions[start:start + batch_size])
+                    for key, positions in groups.items()
+                    for start in range(0, len(positions), batch_size)
+                ]
+                rows = [np.array([chunk[p].row for p in positions], dtype=np.int32) for _, positions in tasks]
+                if pool is None:
+                    ranked = [self.rank(key, task_rows, k) for (key, _), task_rows in zip(tasks, rows)]
+                else:
+                    ranked = pool.map(_worker_rank, [key for key, _ in tasks], rows, itertools.repeat(k))
+                results = [None] * len(chunk)
+                for (_, positions), (ids, scores) in zip(tasks, ranked):
+                    for position, row_ids, row_scores in zip(positions, ids, scores):
+                        valid = row_ids >= 0
+                        results[position] = (row_ids[valid], row_scores[valid])
+                for query, (ids, scores) in zip(chunk, results):
+                    yield query, ids, scores
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+
+_worker_engine = None
+
+
+def _init_worker(features, neighbors, filters):
+    global _worker_engine
+    _worker_engine = Engine(features, neighbors, filters)
+
+
+def _worker_rank(key, rows, k):
+    return _worker_engine.rank(key, rows, k)
+
+
+def read_queries(path, engine):
+    """:class:`Query` objects from a JSONL file; titles are resolved to rows."""
+    rows_by_title = None
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            row = record.get("row")
+            if row is None:
+                if rows_by_title is None:
+                    rows_by_title = {title: row for row, title in enumerate(engine.titles)}
+                row = rows_by_title.get(record.get("title"))
+                if row is None:
+                    raise ValueError(f"{path}:{number}: unknown title {record.get('title')!r}")
+            rating_range = record.get("rating_range")
+            yield Query(int(row), record.get("genres"), record.get("studios"),
+                        tuple(rating_range) if rating_range else None)
+
+
+class JsonlWriter:
+    """One JSON object per query."""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, records):
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Row groups of queries appended to one Parquet file (needs pyarrow)."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("writing Parquet needs pyarrow; use a .jsonl output instead") from None
+        self._pa = pa
+        self._schema = pa.schema([
+            ("row", pa.int32()),
+            ("title", pa.string()),
+            ("genres", pa.list_(pa.string())),
+            ("studios", pa.list_(pa.string())),
+            ("rating_range", pa.list_(pa.float32())),
+            ("ids", pa.list_(pa.int32())),
+            ("titles", pa.list_(pa.string())),
+            ("scores", pa.list_(pa.float32())),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, records):
+        columns = {name: [record[name] for record in records] for name in self._schema.names}
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(path):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path)
+    if path.endswith(".jsonl"):
+        return JsonlWriter(path)
+    raise ValueError(f"unsupported output {path!r}: use .parquet or .jsonl")
+
+
+def to_record(engine, query, ids, scores):
+    titles = engine.titles
+    return {
+        "row": query.row,
+        "title": None if titles is None else titles[query.row],
+        "genres": list(query.genres or ()),
+        "studios": list(query.studios or ()),
+        "rating_range": list(query.rating_range) if query.rating_range else None,
+        "ids": ids.tolist(),
+        "titles": None if titles is None else titles[ids].tolist(),
+        "scores": [round(float(score), 6) for score in scores],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cinema.engine", description=__doc__.split("\n")[0])
+    parser.add_argument("catalog", help=f"one of {sorted(catalog.SOURCES)}")
+    parser.add_argument("--out", required=True, help="output file, .parquet or .jsonl")
+    parser.add_argument("--queries", help="JSONL queries (default: every film, no filter)")
+    parser.add_argument("--k", type=int, default=20, help="recommendations per query")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="queries per sparse product")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="ranking processes")
+    parser.add_argument("--artifacts", default=artifacts.ARTIFACTS_DIR, help="artifacts root directory")
+    args = parser.parse_args(argv)
+    if args.catalog not in catalog.SOURCES:
+        parser.error(f"unknown catalog: {args.catalog}")
+    if not args.out.endswith((".parquet", ".jsonl")):
+        parser.error("--out must end with .parquet or .jsonl")
+
+    start = time.perf_counter()
+    engine = Engine.load(args.catalog, root=args.artifacts)
+    queries = read_queries(args.queries, engine) if args.queries else (Query(row) for row in range(len(engine)))
+    writer = open_writer(args.out)
+    done = 0
+    try:
+        results = engine.recommend_batch(queries, args.k, batch_size=args.batch_size, workers=args.workers)
+        while True:
+            records = [to_record(engine, *result) for result in itertools.islice(results, 4096)]
+            if not records:
+                break
+            writer.write(records)
+            done += len(records)
+    finally:
+        writer.close()
+    print(f"{args.catalog}: {done} queries -> {args.out} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
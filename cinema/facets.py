@@ -0,0 +1,71 @@
+"""Live film counts under the sidebar filters.
+
+The counts come from :meth:`cinema.filters.FilterIndex.facets`. They are
+shown in a block under the filters rather than inside the multiselect
+labels: Streamlit derives a widget's id from its formatted options, so
+labels that change with the counts would reset the selection.
+"""
+import html
+
+import numpy as np
+import streamlit as st
+
+FACETS_CSS = """
+<style>
+.mgc-facets { font-size: 0.8rem; line-height: 1.5; }
+.mgc-facets b { color: gold; }
+.mgc-facets .mgc-zero { opacity: 0.4; }
+</style>
+"""
+
+
+def format_count(count):
+    """``12345`` -> ``'12 345'`` (French narrow no-break space as separator)."""
+    return f"{count:,}".replace(",", "\u202f")
+
+
+def _by_count(counts, codes):
+    """``codes`` by decreasing count, ties in code order."""
+    return codes[np.lexsort((codes, -counts[codes]))]
+
+
+def facet_lines(names, counts, selected=(), limit=None):
+    """``'Name (count)'`` HTML entries, ``selected`` codes first then by decreasing count.
+
+    Only the selected codes and the ``limit`` largest counts are sorted
+    and formatted, not every name.
+    """
+    counts = np.asarray(counts)
+    selected = np.unique(np.asarray(selected, dtype=np.intp))
+    others = np.flatnonzero(counts > 0)
+    others = others[~np.isin(others, selected)]
+    if limit is not None and len(others) > limit:
+        # Compte du `limit`-ième : ceux au-dessus sont gardés, puis les ex æquo dans l'ordre des codes.
+        cut = np.partition(counts[others], len(others) - limit)[len(others) - limit] if limit > 0 else np.inf
+        above = others[counts[others] > cut]
+        others = np.concatenate([above, others[counts[others] == cut][:limit - len(above)]])
+    entries = [(i, True) for i in _by_count(counts, selected)] + [(i, False) for i in _by_count(counts, others)]
+    lines = []
+    for i, chosen in entries:
+        name = html.escape(names[i])
+        label = f"<b>{name}</b>" if chosen else name
+        css = " class='mgc-zero'" if counts[i] == 0 else ""
+        lines.append(f"<span{css}>{label} ({format_count(int(counts[i]))})</span>")
+    return lines
+
+
+def show_facets(filters, genres=None, studios=None, rating_range=None, top_studios=10):
+    """Sidebar block: films left, and counts per genre and per studio."""
+    facets = filters.facets(genres, studios, rating_range)
+    st.sidebar.caption(f"{format_count(facets.total)} films correspondent aux filtres")
+    genre_lines = facet_lines(filters.genre_names, facets.genres, filters.genre_codes(genres or ()))
+    studio_lines = facet_lines(filters.studio_names, facets.studios, filters.studios.codes(studios or ()),
+                               limit=top_studios)
+    with st.sidebar.expander("Nombre de films par filtre"):
+        st.markdown(
+            FACETS_CSS
+            + "<div class='mgc-facets'><p>" + " · ".join(genre_lines) + "</p>"
+            + "<p>" + " · ".join(studio_lines) + "</p></div>",
+            unsafe_allow_html=True,
+        )
+    return facets
@@ -0,0 +1,177 @@
+"""Vectorized sidebar filters.
+
+Everything the Genre / Studio / Notes filters need is precomputed once per
+catalog as NumPy arrays, so applying a filter is a handful of boolean
+operations instead of regex scans over string columns. The sidebar facet
+counts use the same arrays: one packed bitset per genre (and per large
+studio), popcounted against the packed filter mask, and a sparse product
+over the other studios' film lists. Inactive filters build no mask at all.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from cinema import bitsets
+from cinema.metrics import timed
+from cinema.studios import StudioIndex
+
+Facets = namedtuple("Facets", "total genres studios")
+
+
+def _pack_genres(genre_bits, n_genres):
+    """``(n_genres, n_bytes)`` uint8 bitsets (see :mod:`cinema.bitsets`)."""
+    packed = np.zeros((n_genres, bitsets.n_bytes(len(genre_bits))), dtype=np.uint8)
+    for g in range(n_genres):
+        packed[g] = bitsets.pack(((genre_bits >> genre_bits.dtype.type(g)) & 1).astype(bool))
+    return packed
+
+
+def _both(a, b):
+    """``a & b`` where None stands for an inactive filter (every film)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a & b
+
+
+class FilterIndex:
+    """Per-film filter columns, aligned with the catalog row ids.
+
+    * ``genre_bits``: one bit per genre (uint32, or uint64 above 32 genres)
+    * ``studios``: many-to-many film / studio index (:class:`cinema.studios.StudioIndex`)
+    * ``rating``: float32, ``year``: int16
+    * ``recent_first``: row ids sorted by decreasing year
+    """
+
+    def __init__(self, genre_names, genre_bits, studios, rating, year):
+        self.genre_names = list(genre_names)
+        self.genre_bits = genre_bits
+        self.studios = studios
+        self.rating = rating
+        self.year = year
+        self._genre_positions = {name: i for i, name in enumerate(self.genre_names)}
+        self.genre_sets = _pack_genres(self.genre_bits, len(self.genre_names))
+        self.genre_totals = bitsets.popcounts(self.genre_sets, ~np.zeros(self.genre_sets.shape[1], dtype=np.uint8))
+        # Bornes des notes : une plage qui les couvre ne filtre rien (NaN si une note manque : jamais ignorée).
+        self._rating_bounds = (self.rating.min(), self.rating.max()) if len(self.rating) else (np.inf, -np.inf)
+
+        # Ordre d'affichage par défaut (films récents d'abord), calculé une fois.
+        self.recent_first = np.argsort(-self.year.astype(np.int32), kind="stable").astype(np.int32)
+        self.recency_rank = np.empty_like(self.recent_first)
+        self.recency_rank[self.recent_first] = np.arange(len(self.recent_first), dtype=np.int32)
+
+    @classmethod
+    def from_catalog(cls, df):
+        """Build the index from a cleaned catalog frame (see :mod:`cinema.catalog`)."""
+        lists = df["genres"].astype(object).fillna("").str.split(",")
+        rows = np.repeat(np.arange(len(df)), lists.str.len().to_numpy())
+        genres = lists.explode().to_numpy(dtype=object)
+        named = genres != ""
+        genre_codes, genre_names = pd.factorize(genres[named], sort=True)
+        if len(genre_names) > 64:
+            raise ValueError(f"{len(genre_names)} genres, at most 64 fit in a bitmask")
+        dtype = np.uint32 if len(genre_names) <= 32 else np.uint64
+        weights = np.left_shift(dtype(1), np.arange(len(genre_names), dtype=dtype))
+        genre_bits = np.zeros(len(df), dtype=dtype)
+        np.bitwise_or.at(genre_bits, rows[named], weights[genre_codes])
+
+        return cls(
+            genre_names.tolist(),
+            genre_bits,
+            StudioIndex.from_catalog(df),
+            df["averageRating"].to_numpy(dtype=np.float32),
+            df["startYear"].to_numpy(dtype=np.int16),
+        )
+
+    @classmethod
+    def from_arrays(cls, genre_names, studio_names, arrays):
+        """Rebuild the index from the arrays saved by :meth:`arrays`."""
+        studios = StudioIndex(studio_names, arrays["studio_indptr"], arrays["studio_indices"])
+        return cls(genre_names, arrays["genre_bits"], studios, arrays["rating"], arrays["year"])
+
+    def arrays(self):
+        """Arrays stored in the model artifacts (see :data:`cinema.artifacts.FILTER_ARRAYS`)."""
+        return {
+            "genre_bits": self.genre_bits,
+            "studio_indptr": self.studios.indptr,
+            "studio_indices": self.studios.indices,
+            "rating": self.rating,
+            "year": self.year,
+        }
+
+    def __len__(self):
+        return len(self.rating)
+
+    @property
+    def studio_names(self):
+        return self.studios.names
+
+    def genre_codes(self, genres):
+        """Positions of the known genres in ``genres``."""
+        return np.array([self._genre_positions[name] for name in genres if name in self._genre_positions],
+                        dtype=np.int32)
+
+    def genre_query(self, genres):
+        """Bitmask matching any of ``genres``."""
+        query = 0
+        for name in genres:
+            if name in self._genre_positions:
+                query |= 1 << self._genre_positions[name]
+        return self.genre_bits.dtype.type(query)
+
+    def top_studios(self, n=10, mask=None):
+        """The ``n`` studios with the most films (among ``mask``), most popular first."""
+        return self.studios.top(n, mask)
+
+    def genre_counts(self, mask=None):
+        """Number of films of each genre among the films selected by ``mask`` (default: all)."""
+        if mask is None:
+            return self.genre_totals
+        return bitsets.popcounts(self.genre_sets, bitsets.pack(mask))
+
+    @timed("filter.facets")
+    def facets(self, genres=None, studios=None, rating_range=None):
+        """Film counts shown next to the sidebar filters.
+
+        Each facet is counted under the *other* active filters: the genre
+        counts ignore the genre selection (genres combine with OR), and
+        likewise for studios. ``total`` is the number of films left.
+        Each filter mask is built once and shared by the three facets.
+        """
+        by_genre, by_studio, by_rating = self._masks(genres, studios, rating_range)
+        others = _both(by_studio, by_rating)
+        selected = _both(others, by_genre)
+        return Facets(
+            total=len(self) if selected is None else int(np.count_nonzero(selected)),
+            genres=self.genre_counts(others),
+            studios=self.studios.counts(_both(by_genre, by_rating)),
+        )
+
+    def _masks(self, genres=None, studios=None, rating_range=None):
+        """Genre, studio and rating masks, None for a filter that selects every film."""
+        by_genre = (self.genre_bits & self.genre_query(genres)) != 0 if genres else None
+        by_studio = self.studios.mask(studios) if studios else None
+        by_rating = None
+        if rating_range:
+            low, high = rating_range
+            if not (low <= self._rating_bounds[0] and high >= self._rating_bounds[1]):
+                by_rating = (self.rating >= low) & (self.rating <= high)
+        return by_genre, by_studio, by_rating
+
+    @timed("rank.recent")
+    def recent(self, mask):
+        """Row ids selected by ``mask``, most recent films first."""
+        return self.recent_first[mask[self.recent_first]]
+
+    @timed("filter")
+    def mask(self, genres=None, studios=None, rating_range=None):
+        """Boolean mask of the films passing every active filter.
+
+        A film matches the genre filter if it has at least one of the
+        selected genres, and the studio filter if any of its studios is selected.
+        """
+        by_genre, by_studio, by_rating = self._masks(genres, studios, rating_range)
+        mask = _both(_both(by_genre, by_studio), by_rating)
+        return np.ones(len(self), dtype=bool) if mask is None else mask
@@ -0,0 +1,114 @@
+"""Movie card grid rendered as a few large HTML payloads.
+
+Instead of one ``st.markdown`` per card inside ``st.columns(4)`` rows, each
+page of cards ("Afficher plus" step) is a single CSS-grid block. Streamlit
+has no append-only element, so every rerun re-sends the earlier blocks
+unchanged along with the new one: the payload still grows with the pages
+shown, but by one block per page rather than one element per card.
+"""
+import html
+
+import streamlit as st
+
+from cinema.lookup import poster_url
+from cinema.metrics import timed
+
+GALLERY_CSS = """
+<style>
+.mgc-grid {
+    display: grid;
+    grid-template-columns: repeat(4, minmax(0, 1fr));
+    column-gap: 1rem;
+}
+.mgc-card {
+    margin: 0 0 20px 0;
+    border: 1px solid white;
+    border-radius: 16px;
+    overflow: hidden;
+}
+.mgc-card img {
+    display: block;
+    width: 100%;
+}
+.mgc-card .mgc-info {
+    background-color: black;
+    padding: 10px;
+    min-height: 165px;
+    color: white;
+    text-align: left;
+}
+.mgc-card .mgc-star {
+    color: gold;
+    font-size: 22px;
+}
+.mgc-card .mgc-rating {
+    font-size: 16px;
+}
+.mgc-card .mgc-title {
+    font-weight: bold;
+}
+.mgc-card.mgc-cover {
+    border-color: #9E9E9E;
+}
+.mgc-card.mgc-cover .mgc-poster {
+    height: 300px;
+    overflow: hidden;
+}
+.mgc-card.mgc-cover img {
+    height: 100%;
+    object-fit: cover;
+}
+.mgc-card.mgc-cover .mgc-info {
+    min-height: 185px;
+}
+</style>
+"""
+
+# "film" : affiche en hauteur naturelle (page Film), "cover" : affiche recadrée à 300px.
+VARIANTS = {"film": "mgc-card", "cover": "mgc-card mgc-cover"}
+
+
+def card_html(record, variant="film", src=None):
+    """HTML of one movie card from a :data:`~cinema.lookup.CARD_DTYPE` record.
+
+    ``src`` overrides the poster URL (e.g. a locally cached thumbnail).
+    """
+    title = html.escape(str(record["title"]))
+    src = html.escape(src if src is not None else poster_url(record["poster_path"]), quote=True)
+    return (
+        f"<div class='{VARIANTS[variant]}'>"
+        f"<div class='mgc-poster'><img src='{src}' alt='{title}' loading='lazy' decoding='async'></div>"
+        "<div class='mgc-info'>"
+        f"<div><span class='mgc-star'>★</span> <span class='mgc-rating'>{record['rating']:.1f}</span></div>"
+        f"<div class='mgc-title'>{title}</div>"
+        f"<div>({record['year']})</div>"
+        "</div></div>"
+    )
+
+
+def grid_html(records, variant="film", posters=None):
+    """One grid block holding every card of ``records``.
+
+    With a :class:`~cinema.posters.PosterCache`, cards point at its local
+    thumbnails when they are already cached, at TMDB otherwise.
+    """
+    if posters is not None:
+        sources = posters.urls(records["poster_path"], view="card")
+    else:
+        sources = [None] * len(records)
+    cards = (card_html(record, variant, src) for record, src in zip(records, sources))
+    return "<div class='mgc-grid'>" + "".join(cards) + "</div>"
+
+
+@timed("render.gallery")
+def show_gallery(records, page_size, variant="film", posters=None, prefetcher=None):
+    """Render ``records`` as one markdown element per ``page_size`` cards.
+
+    With a :class:`~cinema.posters.Prefetcher`, the thumbnails missing from
+    the cache are then fetched in the background for the next rerun.
+    """
+    st.markdown(GALLERY_CSS, unsafe_allow_html=True)
+    for start in range(0, len(records), page_size):
+        st.markdown(grid_html(records[start:start + page_size], variant, posters), unsafe_allow_html=True)
+    if prefetcher is not None:
+        prefetcher.fill(records["poster_path"])
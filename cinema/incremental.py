@@ -0,0 +1,136 @@
+"""Incremental artifact updates for newly appended films.
+
+New releases are appended to the source CSV. Instead of refitting
+everything, an update:
+
+* vectorizes the new rows against the existing vocabulary, optionally
+  adding at most ``max_new_terms`` unseen tokens as new columns (existing
+  rows keep a zero count for them);
+* computes the neighbour lists of the new rows only;
+* inserts the new rows into the neighbour lists of existing films they
+  now beat ("reverse neighbours");
+* publishes the result as a new artifact version, which the pages pick
+  up on their next rerun.
+
+Rows already in the catalog must keep their position; if they changed,
+a full ``python -m cinema.build`` is required.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from cinema import artifacts, catalog
+from cinema.filters import FilterIndex
+from cinema.neighbors import NeighborIndex, block_size_for, block_top_k, normalize_features
+from cinema.search import TitleIndex
+
+
+class RebuildRequired(Exception):
+    """The catalog changed in a way an incremental update cannot handle."""
+
+
+def grow_vocabulary(vocabulary, texts, max_new_terms):
+    """Extend ``vocabulary`` with the ``max_new_terms`` most frequent unseen tokens."""
+    vocabulary = dict(vocabulary)
+    if max_new_terms <= 0:
+        return vocabulary
+    cv = CountVectorizer()
+    try:
+        counts = cv.fit_transform(texts)
+    except ValueError:
+        # Aucun token dans les nouveaux textes
+        return vocabulary
+    document_frequency = np.asarray((counts > 0).sum(axis=0)).ravel()
+    tokens = cv.get_feature_names_out()
+    unseen = [i for i in np.argsort(-document_frequency, kind="stable") if tokens[i] not in vocabulary]
+    for i in unseen[:max_new_terms]:
+        vocabulary[str(tokens[i])] = len(vocabulary)
+    return vocabulary
+
+
+def merge_reverse_neighbors(neighbors, scores, new_rows, new_scores):
+    """Insert new rows into the neighbour lists of the existing films they beat.
+
+    ``new_scores`` is the sparse (new × existing) similarity matrix;
+    ``neighbors`` / ``scores`` are updated in place. Returns the number of
+    existing films whose list changed.
+    """
+    k = neighbors.shape[1]
+    if k == 0 or new_scores.nnz == 0:
+        return 0
+    coo = new_scores.tocoo()
+    # Seuil d'entrée : score du K-ième voisin, ou -inf si la liste n'est pas pleine.
+    threshold = np.where(neighbors[:, -1] >= 0, scores[:, -1], -np.inf)
+    beats = coo.data > threshold[coo.col]
+    candidates = sparse.csr_matrix(
+        (coo.data[beats], (coo.col[beats], new_rows[coo.row[beats]])),
+        shape=(neighbors.shape[0], new_rows.max() + 1),
+    )
+    affected = np.flatnonzero(np.diff(candidates.indptr))
+    for row in affected:
+        start, stop = candidates.indptr[row], candidates.indptr[row + 1]
+        valid = neighbors[row] >= 0
+        ids = np.concatenate([neighbors[row][valid], candidates.indices[start:stop]])
+        values = np.concatenate([scores[row][valid], candidates.data[start:stop]])
+        best = np.argsort(-values, kind="stable")[:k]
+        neighbors[row] = -1
+        scores[row] = 0.0
+        neighbors[row, :len(best)] = ids[best]
+        scores[row, :len(best)] = values[best]
+    return len(affected)
+
+
+def update(name, max_new_terms=0, root=artifacts.ARTIFACTS_DIR, keep=3):
+    """Add the films appended to the source of ``name`` since the current artifacts.
+
+    Returns the new version name, or None when there is nothing to add.
+    """
+    current = artifacts.load(name, root=root)
+    if current is None:
+        raise RebuildRequired(f"no artifacts for {name!r}, run python -m cinema.build {name}")
+    df = catalog.load(name, features=True)
+    n_old = current.manifest["n_rows"]
+    if len(df) < n_old or catalog.keys_digest(df, name, n_old) != current.manifest.get("keys_digest"):
+        raise RebuildRequired(f"existing rows of {name!r} changed, run python -m cinema.build {name}")
+    if len(df) == n_old:
+        return None
+
+    vocabulary = grow_vocabulary(current.vocabulary, df["combined_features"].iloc[n_old:], max_new_terms)
+    new_features = normalize_features(CountVectorizer(vocabulary=vocabulary).transform(df["combined_features"].iloc[n_old:]))
+    old_features = sparse.csr_matrix(
+        (current.features.data, current.features.indices, current.features.indptr),
+        shape=(n_old, len(vocabulary)),
+    )
+    features = sparse.vstack([old_features, new_features], format="csr")
+    n = features.shape[0]
+
+    k = current.neighbors.k
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    neighbors[:n_old] = current.neighbors.neighbors
+    scores[:n_old] = current.neighbors.scores
+    if k:
+        features_t = features.T.tocsc()
+        block_size = block_size_for(n)
+        for start in range(n_old, n, block_size):
+            stop = min(start + block_size, n)
+            new_ids, new_top = block_top_k(features, start, stop, min(k, n - 1), features_t)
+            neighbors[start:stop, :new_ids.shape[1]] = new_ids
+            scores[start:stop, :new_top.shape[1]] = new_top
+        new_rows = np.arange(n_old, n)
+        merge_reverse_neighbors(neighbors[:n_old], scores[:n_old], new_rows, new_features @ old_features.T)
+
+    filters = FilterIndex.from_catalog(df)
+    titles = TitleIndex.from_titles(df["title"])
+    manifest = dict(
+        current.manifest,
+        source_version=catalog.version(name),
+        keys_digest=catalog.keys_digest(df, name),
+        genre_names=filters.genre_names,
+        studio_names=filters.studio_names,
+        title_grams=titles.gram_names,
+        incremental_from=current.version,
+    )
+    arrays = dict(filters.arrays(), **titles.arrays())
+    return artifacts.write(name, manifest, vocabulary, features, NeighborIndex(neighbors, scores), arrays,
+                           root=root, keep=keep)
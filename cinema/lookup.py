@@ -0,0 +1,61 @@
+"""Title / id lookups and card records for the recommendation path."""
+import numpy as np
+import pandas as pd
+
+POSTER_BASE_URL = "https://image.tmdb.org/t/p/w500"
+
+CARD_DTYPE = np.dtype([
+    ("title", object),
+    ("year", np.int16),
+    ("rating", np.float32),
+    ("poster_path", object),
+])
+
+
+class Lookup:
+    """Title and ``tconst`` lookups of catalog rows, plus card records.
+
+    Titles are resolved through the sorted keys of a
+    :class:`~cinema.search.TitleIndex` (loaded from the artifacts), and
+    ``row_by_tconst`` is a Series indexed by ``tconst``, so building a
+    lookup involves no Python loop over the catalog.
+
+    ``records`` is a contiguous structured array holding the fields a
+    movie card needs, so a whole list of rows is resolved with one
+    ``records[rows]`` take.
+    """
+
+    def __init__(self, df, titles):
+        self.titles = titles
+        self.row_by_tconst = (
+            pd.Series(np.arange(len(df)), index=pd.Index(df["tconst"])) if "tconst" in df
+            else pd.Series([], dtype=np.int64)
+        )
+
+        self.records = np.empty(len(df), dtype=CARD_DTYPE)
+        self.records["title"] = df["title"].tolist()
+        self.records["year"] = df["startYear"].to_numpy()
+        self.records["rating"] = df["averageRating"].to_numpy()
+        self.records["poster_path"] = df["poster_path_y"].tolist()
+
+    def __len__(self):
+        return len(self.records)
+
+    def row(self, title):
+        """Row of ``title`` (exact, then case and accent insensitive), or None."""
+        rows = self.titles.exact(title)
+        if not len(rows):
+            return None
+        same = rows[self.records["title"][rows] == title]
+        return int(same[0] if len(same) else rows[0])
+
+    def title(self, row):
+        return self.records["title"][row]
+
+    def take(self, rows):
+        """Card records of ``rows``, in order."""
+        return self.records[np.asarray(rows, dtype=np.intp)]
+
+
+def poster_url(poster_path, base_url=POSTER_BASE_URL):
+    return f"{base_url}{poster_path}" if poster_path else ""
@@ -0,0 +1,129 @@
+"""Memory accounting for the shared caches and the per-session state.
+
+:func:`nbytes` estimates the memory an object holds, following
+containers and object attributes: NumPy buffers, SciPy sparse matrices
+and DataFrames count their data, memory-mapped arrays count nothing
+(their pages belong to the OS file cache, shared by every process).
+Objects referenced by several caches are counted in each of them, so
+the figures are an upper bound; the process RSS is the ground truth.
+
+:class:`SessionRegistry` keeps the latest footprint of every live
+session so that the admin view can size an instance for N users.
+"""
+import mmap
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+
+
+def _mapped(array):
+    """True if ``array`` is a view of a memory-mapped file."""
+    base = array
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return True
+        base = base.base
+    return isinstance(base, mmap.mmap)
+
+
+def nbytes(obj, _seen=None):
+    """Approximate bytes held by ``obj`` and everything it references."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType, types.MethodType)):
+        # Code et modules : partagés par tout le processus, pas des données en cache.
+        return 0
+    if isinstance(obj, np.ndarray):
+        if _mapped(obj):
+            return 0
+        if isinstance(obj.base, np.ndarray):
+            # Une vue ne coûte que son tableau de base, compté une seule fois.
+            return nbytes(obj.base, seen)
+        size = obj.nbytes
+        if obj.dtype == object:
+            size += sum(nbytes(item, seen) for item in obj.ravel().tolist())
+        return size
+    if hasattr(obj, "memory_usage") and hasattr(obj, "ndim"):
+        # DataFrame / Series / Index : pandas sait compter les objets Python de ses colonnes.
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(obj, "tocsr") and hasattr(obj, "indptr"):
+        return sum(nbytes(getattr(obj, name), seen) for name in ("data", "indices", "indptr"))
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(nbytes(key, seen) + nbytes(value, seen) for key, value in list(obj.items()))
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(nbytes(item, seen) for item in list(obj))
+    else:
+        if hasattr(obj, "__dict__"):
+            size += nbytes(vars(obj), seen)
+        for name in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, name):
+                size += nbytes(getattr(obj, name), seen)
+    return size
+
+
+def format_bytes(size):
+    for unit in ("o", "ko", "Mo"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} Go"
+
+
+class SessionRegistry:
+    """Latest state size of each session, forgotten after ``max_age`` seconds without a run."""
+
+    def __init__(self, max_age=3600, max_sessions=10000, clock=time.monotonic):
+        self.max_age = max_age
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions = {}  # id -> (dernier passage, page, octets)
+        self._lock = threading.Lock()
+
+    def update(self, session_id, page, size):
+        now = self._clock()
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (now, page, size)
+            self._prune(now)
+
+    def _prune(self, now):
+        expired = [key for key, (seen, _, _) in self._sessions.items() if now - seen > self.max_age]
+        for key in expired:
+            del self._sessions[key]
+        # Les dictionnaires gardent l'ordre d'insertion : les premières sessions sont les plus anciennes.
+        while len(self._sessions) > self.max_sessions:
+            del self._sessions[next(iter(self._sessions))]
+
+    def sessions(self):
+        """``[(session_id, page, bytes), ...]``, largest first."""
+        with self._lock:
+            self._prune(self._clock())
+            rows = [(key, page, size) for key, (_, page, size) in self._sessions.items()]
+        return sorted(rows, key=lambda row: -row[2])
+
+    def summary(self):
+        sizes = [size for _, _, size in self.sessions()]
+        return {
+            "sessions": len(sizes),
+            "bytes": sum(sizes),
+            "max_bytes": max(sizes, default=0),
+            "mean_bytes": sum(sizes) / len(sizes) if sizes else 0.0,
+        }
+
+
+def capacity(budget_bytes, shared_bytes, per_session_bytes):
+    """Concurrent sessions that fit in ``budget_bytes`` next to the shared caches."""
+    if per_session_bytes <= 0:
+        return None
+    return max(int((budget_bytes - shared_bytes) // per_session_bytes), 0)
@@ -0,0 +1,158 @@
+"""Opt-in timing spans and metrics export.
+
+Set ``MGC_METRICS=1`` to record spans (data load, similarity, filtering,
+ranking, rendering) and show the debug panel of :mod:`cinema.debug`;
+``MGC_METRICS_FILE`` additionally writes them out after every page run,
+as Prometheus text (``*.prom``, for a node_exporter textfile collector)
+or as JSON lines (any other name).
+
+When metrics are disabled, :func:`span` returns a shared no-op context
+manager and :func:`timed` functions pay a single flag check, so the
+instrumented hot paths cost nothing measurable.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+_enabled = os.environ.get("MGC_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_totals = {}  # nom -> [nombre, somme des secondes, max]
+_local = threading.local()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(value=True):
+    global _enabled
+    _enabled = bool(value)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    """Context manager timing the ``with`` block as ``name``."""
+    return _Span(name) if _enabled else _NO_SPAN
+
+
+def timed(name):
+    """Decorator timing every call of the function as ``name``."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name, seconds):
+    """Add one measurement to the server totals and to the current script run."""
+    with _lock:
+        total = _totals.setdefault(name, [0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += seconds
+        total[2] = max(total[2], seconds)
+    run = getattr(_local, "run", None)
+    if run is None:
+        run = _local.run = []
+    run.append((name, seconds))
+
+
+def take_run():
+    """``[(name, seconds), ...]`` recorded by this thread since the last call."""
+    run = getattr(_local, "run", None) or []
+    _local.run = []
+    return run
+
+
+def totals():
+    """``{name: (count, seconds, max_seconds)}`` since the server started."""
+    with _lock:
+        return {name: tuple(total) for name, total in _totals.items()}
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+    _local.run = []
+
+
+def rss_bytes():
+    """Resident memory of this process, or None if it cannot be read."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def prometheus_text(gauges=None):
+    """Span totals and ``gauges`` (``{name: value}``) in the Prometheus text format."""
+    lines = [
+        "# HELP mgc_span_seconds Time spent in instrumented code paths.",
+        "# TYPE mgc_span_seconds summary",
+    ]
+    for name, (count, seconds, _) in sorted(totals().items()):
+        lines.append(f'mgc_span_seconds_count{{span="{name}"}} {count}')
+        lines.append(f'mgc_span_seconds_sum{{span="{name}"}} {seconds:.6f}')
+    lines += ["# HELP mgc_span_max_seconds Slowest call of each span.", "# TYPE mgc_span_max_seconds gauge"]
+    for name, (_, _, slowest) in sorted(totals().items()):
+        lines.append(f'mgc_span_max_seconds{{span="{name}"}} {slowest:.6f}')
+    for name, value in sorted((gauges or {}).items()):
+        if value is not None:
+            lines += [f"# TYPE mgc_{name} gauge", f"mgc_{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def export(path, page, spans, gauges=None):
+    """Write the metrics to ``path``: Prometheus text for ``*.prom``, one JSON line per run otherwise."""
+    if path.endswith(".prom"):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(prometheus_text(gauges))
+        os.replace(tmp, path)
+        return
+    record_line = {
+        "time": time.time(),
+        "page": page,
+        "spans": [[name, round(seconds, 6)] for name, seconds in spans],
+        "gauges": gauges or {},
+    }
+    with _lock, open(path, "a") as f:
+        f.write(json.dumps(record_line, ensure_ascii=False) + "\n")
@@ -0,0 +1,199 @@
+"""Sparse top-K neighbour index.
+
+Instead of materializing the dense N×N ``cosine_similarity`` matrix, only
+the K most similar films of each film are kept, as int32 ids and float32
+scores. The index is built from the ``CountVectorizer`` matrix one block
+of rows at a time, optionally over a process pool, so peak memory is
+about ``workers × block_size × N × BYTES_PER_SCORE``. Unless told
+otherwise, the block size is derived from the memory available on the
+machine (see :func:`block_size_for`).
+"""
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+DEFAULT_K = 100
+# Taille de bloc maximale, atteinte quand la mémoire le permet (petits catalogues).
+DEFAULT_BLOCK_SIZE = 1024
+# Octets par score d'un bloc au pic : le bloc dense float32 (4) plus le produit creux dont il
+# est issu (données float32 + indices int32, 8 au pire quand le produit est plein).
+BYTES_PER_SCORE = 12
+# Les indices int64 d'argpartition ne portent que sur SELECT_ROWS lignes à la fois.
+SELECT_ROWS = 64
+# Part de la mémoire disponible allouée aux blocs quand aucun budget n'est donné.
+DEFAULT_MEMORY_FRACTION = 0.5
+FALLBACK_MEMORY_BYTES = 2 * 1024 ** 3
+
+
+class NeighborIndex:
+    """Top-K neighbours of every film, sorted by decreasing similarity.
+
+    ``neighbors[i]`` holds the row ids of the films most similar to row
+    ``i`` (the film itself excluded) and ``scores[i]`` their cosine
+    similarity. Rows with fewer than K neighbours are padded with -1.
+    """
+
+    def __init__(self, neighbors, scores):
+        self.neighbors = neighbors
+        self.scores = scores
+
+    def __len__(self):
+        return self.neighbors.shape[0]
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.neighbors.nbytes + self.scores.nbytes
+
+    def top(self, row, n=None):
+        """Return ``(ids, scores)`` of the ``n`` best neighbours of ``row``."""
+        ids = self.neighbors[row, :n]
+        scores = self.scores[row, :n]
+        valid = ids >= 0
+        return ids[valid], scores[valid]
+
+
+def normalize_features(count_matrix):
+    """L2-normalize the rows so that a dot product is a cosine similarity."""
+    return normalize(count_matrix.astype(np.float32), norm="l2").tocsr()
+
+
+def block_top_k(features, start, stop, k, features_t=None):
+    """Top-``k`` neighbours of rows ``start:stop`` against every row."""
+    if features_t is None:
+        features_t = features.T.tocsc()
+    n = features.shape[0]
+    block = (features[start:stop] @ features_t).toarray()
+    rows = np.arange(stop - start)
+    # Un film n'est jamais son propre voisin.
+    block[rows, start + rows] = -np.inf
+
+    ids = np.empty((stop - start, k), dtype=np.int32)
+    scores = np.empty((stop - start, k), dtype=np.float32)
+    for first in range(0, stop - start, SELECT_ROWS):
+        part = block[first:first + SELECT_ROWS]
+        # Les k plus grands sans copier le bloc (pas de -block) : partition autour de n - k.
+        if k < n:
+            candidates = np.argpartition(part, n - k, axis=1)[:, n - k:]
+        else:
+            candidates = np.broadcast_to(np.arange(n), part.shape)
+        candidate_scores = np.take_along_axis(part, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        ids[first:first + SELECT_ROWS] = np.take_along_axis(candidates, order, axis=1)
+        scores[first:first + SELECT_ROWS] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    padding = ~np.isfinite(scores)
+    ids[padding] = -1
+    scores[padding] = 0.0
+    return ids, scores
+
+
+def available_memory():
+    """Bytes of memory available to new allocations, or None if unknown."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_memory_budget():
+    """Memory budget of the similarity blocks: half of the available memory."""
+    available = available_memory()
+    return int(available * DEFAULT_MEMORY_FRACTION) if available else FALLBACK_MEMORY_BYTES
+
+
+def block_size_for(n, workers=1, memory_bytes=None, max_block_size=DEFAULT_BLOCK_SIZE):
+    """Largest block size (at most ``max_block_size``) keeping the blocks under ``memory_bytes``.
+
+    Each block row costs about ``N × BYTES_PER_SCORE`` bytes at its peak,
+    and every worker holds one block at a time. Without ``memory_bytes``,
+    the budget is :func:`default_memory_budget`.
+    """
+    if not memory_bytes:
+        memory_bytes = default_memory_budget()
+    per_row = max(n, 1) * BYTES_PER_SCORE
+    return max(1, min(max_block_size, int(memory_bytes // (per_row * max(workers, 1)))))
+
+
+# État des processus de calcul, initialisé une fois par processus.
+_worker_features = None
+_worker_features_t = None
+
+
+def _init_worker(features):
+    global _worker_features, _worker_features_t
+    _worker_features = features
+    _worker_features_t = features.T.tocsc()
+
+
+def _worker_block(start, stop, k):
+    return start, stop, block_top_k(_worker_features, start, stop, k, _worker_features_t)
+
+
+def build_neighbor_index(count_matrix, k=DEFAULT_K, block_size=None, workers=1, progress=None):
+    """Build a :class:`NeighborIndex` from a sparse ``CountVectorizer`` matrix.
+
+    Row blocks are reduced to their top-``k`` as soon as they are computed,
+    so only ``workers × block_size`` rows of scores exist at any time.
+    ``block_size`` defaults to :func:`block_size_for` the available memory.
+    With ``workers > 1`` blocks are spread over a process pool.
+    ``progress(done_rows, total_rows)`` is called after every block.
+    """
+    features = normalize_features(count_matrix)
+    n = features.shape[0]
+    k = max(min(k, n - 1), 0)
+    if block_size is None:
+        block_size = block_size_for(n, workers)
+
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if k == 0:
+        return NeighborIndex(neighbors, scores)
+
+    blocks = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+    done = 0
+    if workers <= 1 or len(blocks) == 1:
+        features_t = features.T.tocsc()
+        for start, stop in blocks:
+            neighbors[start:stop], scores[start:stop] = block_top_k(features, start, stop, k, features_t)
+            done += stop - start
+            if progress is not None:
+                progress(done, n)
+        return NeighborIndex(neighbors, scores)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features,)) as pool:
+        pending = set()
+        queue = iter(blocks)
+        # Au plus deux blocs en attente par processus : les résultats sont fusionnés au fil de l'eau.
+        for start, stop in itertools.islice(queue, 2 * workers):
+            pending.add(pool.submit(_worker_block, start, stop, k))
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                start, stop, (block_ids, block_scores) = future.result()
+                neighbors[start:stop], scores[start:stop] = block_ids, block_scores
+                done += stop - start
+                if progress is not None:
+                    progress(done, n)
+            for start, stop in itertools.islice(queue, len(finished)):
+                pending.add(pool.submit(_worker_block, start, stop, k))
+    return NeighborIndex(neighbors, scores)
@@ -0,0 +1,347 @@
+"""Local poster cache and thumbnail proxy for TMDB images.
+
+A poster is fetched once, resized to the width a view actually displays
+and written under ``static/posters``, which Streamlit serves itself
+(``server.enableStaticServing``). Cards then point at the local
+thumbnail instead of the full-size TMDB original.
+
+Rendering never waits on a download: a card whose thumbnail is not on
+disk yet points at TMDB, and the thumbnail is fetched in the background
+by a :class:`Prefetcher` for the next rerun. A poster that failed is not
+retried before ``failure_ttl`` seconds.
+
+The fetch backend is pluggable: :class:`HttpFetcher` talks to TMDB (or
+any server laid out like it, e.g. a local ``python -m http.server``),
+:class:`DirectoryFetcher` reads from a local directory so the cache also
+works fully offline.
+
+:class:`Prefetcher` warms the next page of thumbnails on a small thread
+pool after a page is rendered, so "Afficher plus" finds them on disk.
+"""
+import io
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image
+
+from cinema.lookup import POSTER_BASE_URL
+from cinema.metrics import timed
+
+STATIC_DIR = "./static"
+CACHE_DIR = os.path.join(STATIC_DIR, "posters")
+# URL sous laquelle Streamlit sert le dossier ./static
+URL_PREFIX = "app/static/posters"
+
+# Largeur (px) des vignettes par vue : les cartes s'affichent vers 300px.
+POSTER_SIZES = {
+    "card": 342,
+    "detail": 500,
+}
+
+DEFAULT_BUDGET_BYTES = 512 * 1024 * 1024
+# Une affiche introuvable ou un serveur injoignable n'est pas retenté avant 10 minutes.
+DEFAULT_FAILURE_TTL = 600
+MAX_FAILURES = 10000
+
+# Streamlit 1.23 (requirements.txt) ne sert que jpg/png/gif avec le bon type MIME : JPEG par défaut.
+FORMATS = {"jpeg": ("JPEG", "jpg"), "webp": ("WEBP", "webp")}
+
+
+class HttpFetcher:
+    """Download original posters over HTTP (TMDB by default)."""
+
+    def __init__(self, base_url=POSTER_BASE_URL, timeout=10):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def __call__(self, poster_path):
+        with urllib.request.urlopen(f"{self.base_url}{poster_path}", timeout=self.timeout) as response:
+            return response.read()
+
+
+class DirectoryFetcher:
+    """Read posters from a local directory laid out like TMDB paths."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def __call__(self, poster_path):
+        with open(os.path.join(self.root, poster_path.lstrip("/")), "rb") as f:
+            return f.read()
+
+
+def resize(data, width, fmt="jpeg", quality=80):
+    """Shrink image bytes to ``width`` pixels wide and re-encode them."""
+    image = Image.open(io.BytesIO(data))
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    out = io.BytesIO()
+    image.convert("RGB").save(out, format=FORMATS[fmt][0], quality=quality, optimize=True)
+    return out.getvalue()
+
+
+class PosterCache:
+    """Disk cache of resized posters, bounded by ``budget_bytes``.
+
+    When the cache grows past its budget, the least recently used
+    thumbnails (oldest modification time, refreshed on every hit) are
+    deleted until it is back under 90% of the budget.
+
+    ``hits`` and ``misses`` count the cards rendered with and without a
+    local thumbnail; ``fetched`` and ``errors`` count the downloads.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, fetcher=None, budget_bytes=DEFAULT_BUDGET_BYTES,
+                 fmt="jpeg", quality=80, url_prefix=URL_PREFIX, sizes=POSTER_SIZES,
+                 failure_ttl=DEFAULT_FAILURE_TTL, clock=time.monotonic):
+        self.cache_dir = cache_dir
+        self.fetcher = fetcher if fetcher is not None else HttpFetcher()
+        self.budget_bytes = budget_bytes
+        self.fmt = fmt
+        self.quality = quality
+        self.url_prefix = url_prefix
+        self.sizes = dict(sizes)
+        self.failure_ttl = failure_ttl
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}  # (poster_path, view) -> Future du téléchargement en cours
+        self._failed = OrderedDict()  # (poster_path, view) -> date à partir de laquelle on peut retenter
+        os.makedirs(cache_dir, exist_ok=True)
+        self._bytes = sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file())
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def filename(self, poster_path, view="card"):
+        stem = re.sub(r"[^A-Za-z0-9_-]", "_", os.path.splitext(poster_path.lstrip("/"))[0])
+        return f"{stem}-w{self.sizes[view]}.{FORMATS[self.fmt][1]}"
+
+    def _path(self, poster_path, view):
+        return os.path.join(self.cache_dir, self.filename(poster_path, view))
+
+    def cached(self, poster_path, view="card"):
+        """True if the ``view`` thumbnail is already on disk."""
+        return bool(poster_path) and os.path.exists(self._path(poster_path, view))
+
+    def _recently_failed(self, key):
+        # Appelé sous self._lock.
+        retry_at = self._failed.get(key)
+        if retry_at is None:
+            return False
+        if retry_at > self._clock():
+            return True
+        del self._failed[key]
+        return False
+
+    def pending(self, poster_path, view="card"):
+        """True if the poster is being downloaded or failed less than ``failure_ttl`` ago."""
+        key = (poster_path, view)
+        with self._lock:
+            return key in self._in_flight or self._recently_failed(key)
+
+    def get(self, poster_path, view="card"):
+        """Local file of the ``view`` thumbnail, downloaded if needed; None on failure.
+
+        Blocking: meant for background threads. Concurrent calls for one
+        poster share a single download.
+        """
+        if not poster_path:
+            return None
+        path = self._path(poster_path, view)
+        if os.path.exists(path):
+            return path
+        key = (poster_path, view)
+        with self._lock:
+            if self._recently_failed(key):
+                return None
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+        result = None
+        try:
+            result = self._download(poster_path, view, path)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_result(result)
+        return result
+
+    def _download(self, poster_path, view, path):
+        try:
+            data = resize(self.fetcher(poster_path), self.sizes[view], self.fmt, self.quality)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+                self._failed[(poster_path, view)] = self._clock() + self.failure_ttl
+                while len(self._failed) > MAX_FAILURES:
+                    self._failed.popitem(last=False)
+            return None
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.fetched += 1
+            self._bytes += len(data)
+            over_budget = self._bytes > self.budget_bytes
+        if over_budget:
+            self.evict()
+        return path
+
+    def url(self, poster_path, view="card"):
+        """URL to put in ``<img src>``: the local thumbnail if cached, TMDB otherwise. Never downloads."""
+        if not poster_path:
+            return ""
+        path = self._path(poster_path, view)
+        if os.path.exists(path):
+            self.hits += 1
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return f"{self.url_prefix}/{os.path.basename(path)}"
+        self.misses += 1
+        return f"{POSTER_BASE_URL}{poster_path}"
+
+    @timed("render.posters")
+    def urls(self, poster_paths, view="card"):
+        """:meth:`url` of several posters."""
+        return [self.url(path, view) for path in poster_paths]
+
+    def evict(self, target=0.9):
+        """Delete least recently used thumbnails until under ``target`` × budget."""
+        with self._lock:
+            entries = [entry for entry in os.scandir(self.cache_dir)
+                       if entry.is_file() and not entry.name.endswith(".tmp")]
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            total = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if total <= self.budget_bytes * target:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                total -= size
+            self._bytes = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            failed = len(self._failed)
+        return {
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetched": self.fetched,
+            "errors": self.errors,
+            "failed": failed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class Prefetcher:
+    """Fetch thumbnails into a :class:`PosterCache` in the background.
+
+    :meth:`fill` queues the missing thumbnails of the cards just rendered,
+    :meth:`warm` those of the next page. At most ``max_in_flight`` posters
+    are queued or being fetched at a time; extra ones wait for a later
+    rerun. Each :meth:`warm` call belongs to a ``group`` (one per session)
+    and cancels what the previous call of that group still had queued, so
+    changing the filters never leaves stale downloads ahead of the
+    current ones. Posters already on disk, being downloaded (by anyone)
+    or recently failed are skipped.
+    """
+
+    def __init__(self, cache, max_workers=4, max_in_flight=64):
+        self.cache = cache
+        self.max_in_flight = max_in_flight
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="poster-prefetch")
+        # RLock : un futur déjà terminé appelle _release dans le thread qui l'enregistre.
+        self._lock = threading.RLock()
+        self._pending = {}  # groupe -> futurs de son dernier appel
+        self._queued = set()  # (poster_path, view) confiés au pool
+        self.queued = 0
+        self.cancelled = 0
+        self.skipped = 0
+
+    def fill(self, poster_paths, view="card"):
+        """Queue the missing ``view`` thumbnails of ``poster_paths``; returns how many."""
+        return len(self._submit(poster_paths, view))
+
+    def warm(self, group, poster_paths, view="card"):
+        """Like :meth:`fill`, after cancelling what ``group`` still had queued."""
+        self.cancel(group)
+        futures = self._submit(poster_paths, view)
+        with self._lock:
+            # Les groupes dont tout est terminé sont oubliés : une entrée par session active au plus.
+            self._pending = {g: fs for g, fs in self._pending.items() if not all(f.done() for f in fs)}
+            if futures:
+                self._pending[group] = futures
+        return len(futures)
+
+    def _submit(self, poster_paths, view):
+        missing = [path for path in dict.fromkeys(poster_paths)
+                   if path and not self.cache.cached(path, view) and not self.cache.pending(path, view)]
+        futures = []
+        with self._lock:
+            for path in missing:
+                key = (path, view)
+                if key in self._queued:
+                    continue
+                if len(self._queued) >= self.max_in_flight:
+                    self.skipped += 1
+                    continue
+                self._queued.add(key)
+                future = self._pool.submit(self.cache.get, path, view)
+                future.add_done_callback(lambda _, key=key: self._release(key))
+                futures.append(future)
+            self.queued += len(futures)
+        return futures
+
+    def cancel(self, group):
+        """Cancel what ``group`` still has queued (fetches already running complete)."""
+        with self._lock:
+            futures = self._pending.pop(group, ())
+        cancelled = sum(future.cancel() for future in futures)
+        with self._lock:
+            self.cancelled += cancelled
+        return cancelled
+
+    def _release(self, key):
+        with self._lock:
+            self._queued.discard(key)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # Attend la fin de ce qui est en file (utile hors serveur : scripts, tests).
+        self._pool.shutdown(wait=True)
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._queued),
+                "queued": self.queued,
+                "cancelled": self.cancelled,
+                "skipped": self.skipped,
+            }
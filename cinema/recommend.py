@@ -0,0 +1,50 @@
+"""Filter-aware top-K recommendation.
+
+The filter mask is applied before ranking: the similarity row of the
+selected film is computed from the sparse features, restricted to the
+eligible films, and only the best ``k`` are selected with
+``argpartition``. A restrictive filter therefore still yields ``k``
+results whenever ``k`` films pass it.
+"""
+import numpy as np
+
+from cinema.metrics import span
+
+
+def top_k(scores, k):
+    """Positions of the ``k`` highest ``scores``, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def similarity_row(features, row):
+    """Cosine similarity of ``row`` with every film (features are L2-normalized)."""
+    return (features @ features[row].T).toarray().ravel()
+
+
+def recommend(features, row, k, mask=None, neighbors=None):
+    """Return ``(ids, scores)`` of the ``k`` films most similar to ``row``.
+
+    Only films selected by the boolean ``mask`` are candidates; the film
+    itself never is. When nothing is filtered out and ``k`` fits in the
+    precomputed ``neighbors`` index, it is read from there directly.
+    """
+    if neighbors is not None and k <= neighbors.k and (mask is None or mask.all()):
+        with span("similarity.neighbors"):
+            return neighbors.top(row, k)
+
+    candidates = np.ones(features.shape[0], dtype=bool) if mask is None else mask.copy()
+    candidates[row] = False
+    candidates = np.flatnonzero(candidates)
+
+    with span("similarity"):
+        scores = similarity_row(features, row)[candidates]
+    with span("rank"):
+        best = top_k(scores, k)
+    return candidates[best].astype(np.int32), scores[best]
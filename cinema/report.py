@@ -0,0 +1,35 @@
+"""Rasterization of the Power BI report PDF, one page at a time."""
+import io
+import os
+
+import fitz
+
+from cinema.metrics import timed
+
+# Résolution de get_pixmap() par défaut
+DEFAULT_DPI = 72
+
+
+def page_count(pdf_path):
+    with fitz.open(pdf_path) as pdf:
+        return len(pdf)
+
+
+@timed("render.report")
+def render_page(pdf_path, page_number, dpi=DEFAULT_DPI, fmt="png"):
+    """Render one page of ``pdf_path`` to compressed PNG (or WebP) bytes."""
+    with fitz.open(pdf_path) as pdf:
+        pix = pdf.load_page(page_number).get_pixmap(dpi=dpi)
+        if fmt == "png":
+            return pix.tobytes("png")
+        from PIL import Image
+
+        image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        out = io.BytesIO()
+        image.save(out, format=fmt.upper(), quality=85)
+        return out.getvalue()
+
+
+def file_key(pdf_path):
+    """``(path, mtime)`` pair identifying the current version of the file."""
+    return os.path.abspath(pdf_path), os.path.getmtime(pdf_path)
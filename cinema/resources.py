@@ -0,0 +1,270 @@
+"""Streamlit-side caches shared by every page and every session.
+
+Each public loader resolves the catalog fingerprint (one ``os.stat``, see
+:func:`cinema.catalog.version`) and passes it to a cached private
+function, so that a replaced CSV or a newly built artifact version is
+picked up without a server restart. Nothing large is ever a cache
+argument, so Streamlit never hashes a DataFrame, and everything lives in
+``st.cache_resource``: a cache hit returns the shared object without
+pickling or copying it.
+
+The model, filters and title index come from the artifacts written by
+``python -m cinema.build``. When the source is newer than the artifacts
+(films appended since the last build), the last built version keeps
+being served, with a logged warning, rather than refitting the model on
+a user request; only a catalog whose existing rows changed is refitted.
+
+Every cache is bounded: loaders keep at most two versions per catalog and
+expire after ``MGC_RESOURCE_TTL`` seconds, the ranked results have a byte
+budget (``MGC_RESULT_CACHE_MB``) and the posters a disk budget. With
+``MGC_METRICS`` set, the size of each loaded resource is recorded for the
+memory view of :mod:`cinema.debug`.
+"""
+import functools
+import logging
+import os
+import uuid
+import weakref
+
+import streamlit as st
+
+from cinema import artifacts, build, catalog, report
+from cinema.discovery import DiscoverySampler
+from cinema.engine import Engine
+from cinema.filters import FilterIndex
+from cinema.lookup import POSTER_BASE_URL, Lookup
+from cinema.memory import SessionRegistry, nbytes
+from cinema.metrics import enabled as metrics_enabled, span
+from cinema.posters import DirectoryFetcher, HttpFetcher, PosterCache, Prefetcher
+from cinema.result_cache import ResultCache
+from cinema.search import TitleIndex
+
+logger = logging.getLogger(__name__)
+
+# Version courante et précédente de chaque catalogue, le temps qu'un remplacement se propage.
+RESOURCE_MAX_ENTRIES = 2 * len(catalog.SOURCES)
+RESOURCE_TTL = int(os.environ.get("MGC_RESOURCE_TTL", 24 * 3600))
+
+# (chargeur, catalogue) -> (octets mesurés au chargement, référence faible ou None)
+_loaded = {}
+
+
+def _measured(func):
+    """Record the size of what ``func`` loads for the memory view (only when metrics are enabled)."""
+    @functools.wraps(func)
+    def wrapper(name, *args):
+        value = func(name, *args)
+        if metrics_enabled() and value is not None:
+            try:
+                ref = weakref.ref(value)
+            except TypeError:
+                ref = None
+            _loaded[(func.__name__.lstrip("_"), name)] = (nbytes(value), ref)
+        return value
+    return wrapper
+
+
+def loaded_resources():
+    """``{(loader, catalog): (bytes, value or None)}`` of the latest loads, see :func:`_measured`."""
+    return {key: (size, ref() if ref is not None else None) for key, (size, ref) in list(_loaded.items())}
+
+
+def load_catalog(name):
+    """Cleaned catalog, loaded once per server process and catalog version.
+
+    The frame is shared across sessions: pages must treat it as read-only.
+    """
+    return _load_catalog(name, catalog.version(name))
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _load_catalog(name, source_version):
+    with span("load.catalog"):
+        return catalog.load(name)
+
+
+def load_artifacts(name):
+    """Artifact version of ``name`` to serve, or None if none matches the catalog rows.
+
+    That is the current version, even when it was built from an older
+    source, as long as the catalog rows it covers are unchanged.
+    """
+    return _load_artifacts(name, artifacts.current_version(name), catalog.version(name))
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _load_artifacts(name, version, source_version):
+    with span("load.artifacts"):
+        loaded = artifacts.load(name, version) if version else None
+    if loaded is None or loaded.manifest.get("source_version") == source_version:
+        return loaded
+    # Source plus récente : la dernière version construite reste servie tant que ses lignes gardent leur id
+    # (films ajoutés en fin de fichier, invisibles jusqu'à la prochaine construction).
+    df = load_catalog(name)
+    n_rows = loaded.manifest["n_rows"]
+    if len(df) >= n_rows and catalog.keys_digest(df, name, n_rows) == loaded.manifest.get("keys_digest"):
+        logger.warning("%s: artifacts %s are older than the source, serving them until "
+                       "`python -m cinema.build %s` (or --incremental) runs", name, loaded.version, name)
+        return loaded
+    logger.warning("%s: catalog rows changed since artifacts %s, fitting the model in-process; "
+                   "run `python -m cinema.build %s`", name, loaded.version, name)
+    return None
+
+
+def load_model(name):
+    """``(features, neighbors)`` of the catalog ``name``, shared by every page.
+
+    Memory-mapped from the artifacts (see :func:`load_artifacts`), fitted
+    in-process only when there are none for the current catalog rows.
+    """
+    loaded = load_artifacts(name)
+    if loaded is not None:
+        return loaded.features, loaded.neighbors
+    return _fit_model(name, catalog.version(name))
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _fit_model(name, source_version):
+    # Le texte du modèle n'est chargé que le temps de l'ajustement, pas dans le catalogue partagé.
+    df = catalog.load(name, features=True)
+    with span("similarity.fit"):
+        features, _, neighbors = build.build_model(df)
+    return features, neighbors
+
+
+def load_engine(name):
+    """:class:`~cinema.engine.Engine` of the catalog ``name`` (model, neighbours and filters)."""
+    loaded = load_artifacts(name)
+    return _load_engine(name, catalog.version(name), loaded.version if loaded is not None else None)
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _load_engine(name, source_version, artifacts_version):
+    features, neighbors = load_model(name)
+    return Engine(features, neighbors, load_filters(name), load_catalog(name)["title"])
+
+
+def load_filters(name):
+    """:class:`~cinema.filters.FilterIndex` of the catalog ``name``."""
+    loaded = load_artifacts(name)
+    return _load_filters(name, catalog.version(name), loaded.version if loaded is not None else None)
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _load_filters(name, source_version, artifacts_version):
+    loaded = load_artifacts(name) if artifacts_version else None
+    if loaded is not None and set(artifacts.FILTER_ARRAYS) <= set(loaded.arrays):
+        manifest = loaded.manifest
+        return FilterIndex.from_arrays(manifest["genre_names"], manifest["studio_names"], loaded.arrays)
+    df = load_catalog(name)
+    with span("load.filters"):
+        return FilterIndex.from_catalog(df)
+
+
+def load_titles(name):
+    """:class:`~cinema.search.TitleIndex` of the catalog ``name``."""
+    loaded = load_artifacts(name)
+    return _load_titles(name, catalog.version(name), loaded.version if loaded is not None else None)
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _load_titles(name, source_version, artifacts_version):
+    loaded = load_artifacts(name) if artifacts_version else None
+    if loaded is not None and set(artifacts.TITLE_ARRAYS) <= set(loaded.arrays):
+        return TitleIndex.from_arrays(loaded.manifest["title_grams"], loaded.arrays)
+    df = load_catalog(name)
+    with span("load.titles"):
+        return TitleIndex.from_titles(df["title"])
+
+
+def load_lookup(name):
+    """:class:`~cinema.lookup.Lookup` of the catalog ``name``."""
+    loaded = load_artifacts(name)
+    return _load_lookup(name, catalog.version(name), loaded.version if loaded is not None else None)
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _load_lookup(name, source_version, artifacts_version):
+    df = load_catalog(name)
+    with span("load.lookup"):
+        return Lookup(df, load_titles(name))
+
+
+def load_sampler(name):
+    """:class:`~cinema.discovery.DiscoverySampler` of the catalog ``name``."""
+    return _load_sampler(name, catalog.version(name))
+
+
+@st.cache_resource(show_spinner=False, max_entries=RESOURCE_MAX_ENTRIES, ttl=RESOURCE_TTL)
+@_measured
+def _load_sampler(name, source_version):
+    df = load_catalog(name)
+    popularity = df["numVotes"].to_numpy() if "numVotes" in df else None
+    return DiscoverySampler(load_filters(name), popularity=popularity)
+
+
+@st.cache_resource(show_spinner=False, max_entries=1, ttl=None)
+def result_cache():
+    """Ranked recommendation lists shared by every session (LRU + TTL + byte budget)."""
+    budget_mb = int(os.environ.get("MGC_RESULT_CACHE_MB", "64"))
+    return ResultCache(max_entries=512, ttl=3600, max_bytes=budget_mb * 1024 * 1024)
+
+
+@st.cache_resource(show_spinner=False, max_entries=1, ttl=None)
+def session_registry():
+    """Latest state size of every session, for the memory view."""
+    return SessionRegistry(max_age=RESOURCE_TTL)
+
+
+@st.cache_resource(show_spinner=False, max_entries=1, ttl=None)
+def poster_cache():
+    """Server-wide :class:`~cinema.posters.PosterCache`.
+
+    ``MGC_POSTER_SOURCE_DIR`` points the cache at a local directory instead
+    of TMDB (offline use), ``MGC_POSTER_BASE_URL`` at another HTTP server
+    (e.g. a local stand-in) and ``MGC_POSTER_BUDGET_MB`` sets its disk budget.
+    """
+    source_dir = os.environ.get("MGC_POSTER_SOURCE_DIR")
+    if source_dir:
+        fetcher = DirectoryFetcher(source_dir)
+    else:
+        fetcher = HttpFetcher(os.environ.get("MGC_POSTER_BASE_URL", POSTER_BASE_URL))
+    budget_mb = int(os.environ.get("MGC_POSTER_BUDGET_MB", "512"))
+    return PosterCache(fetcher=fetcher, budget_bytes=budget_mb * 1024 * 1024)
+
+
+@st.cache_resource(show_spinner=False, max_entries=1, ttl=None)
+def poster_prefetcher():
+    """Server-wide :class:`~cinema.posters.Prefetcher` of :func:`poster_cache`.
+
+    ``MGC_PREFETCH_WORKERS`` (default 4) and ``MGC_PREFETCH_MAX`` (default
+    64) bound its threads and the posters queued at a time.
+    """
+    workers = max(int(os.environ.get("MGC_PREFETCH_WORKERS", "4")), 1)
+    return Prefetcher(poster_cache(), max_workers=workers, max_in_flight=int(os.environ.get("MGC_PREFETCH_MAX", "64")))
+
+
+def session_id():
+    """Identifier of the current browser session, stable across its reruns."""
+    return st.session_state.setdefault('_mgc_session_id', uuid.uuid4().hex)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4, ttl=RESOURCE_TTL)
+def report_page_count(pdf_path, mtime):
+    return report.page_count(pdf_path)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64, ttl=RESOURCE_TTL)
+def report_page(pdf_path, mtime, page_number, dpi=report.DEFAULT_DPI):
+    """One report page as PNG bytes, rendered once and shared by every session.
+
+    ``mtime`` is part of the cache key so that a replaced PDF is re-rendered.
+    """
+    return report.render_page(pdf_path, page_number, dpi)
@@ -0,0 +1,105 @@
+"""Bounded, server-wide cache of ranked recommendation lists.
+
+"Afficher plus" only needs the next slice of an already ranked list, so
+the full ranked id array is kept per (film, filters, catalog version)
+and pagination becomes a slice instead of a new ranking. Besides its
+entry count, a cache can be bounded by the bytes of its values
+(``max_bytes``, measured with :func:`cinema.memory.nbytes`).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from cinema.memory import nbytes
+
+
+def filters_key(genres_filter, selected_studios, rating_range):
+    """Order-insensitive, hashable form of the sidebar filters."""
+    return (
+        tuple(sorted(genres_filter or ())),
+        tuple(sorted(selected_studios or ())),
+        tuple(float(bound) for bound in rating_range) if rating_range else None,
+    )
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a time-to-live, an optional byte budget and hit/miss counters."""
+
+    def __init__(self, max_entries=512, ttl=3600, max_bytes=None, clock=time.monotonic, sizeof=nbytes):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # clé -> (expiration, valeur, octets)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or entry[0] > self._clock()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+                self.evictions += 1
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        expires = self._clock() + self.ttl if self.ttl is not None else None
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Plus gros que tout le budget : on ne le garde pas plutôt que de vider le cache.
+                self.evictions += 1
+                return
+            self._entries[key] = (expires, value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[2]
+
+    def get_or_compute(self, key, compute):
+        """Cached value of ``key``, calling ``compute()`` on a miss.
+
+        Arrays are stored read-only since they are shared by every session.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if hasattr(value, "setflags"):
+                value.setflags(write=False)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,204 @@
+"""Title search indexes for the Film search box and the Recommendation picker.
+
+Prefix lookups are binary searches over the sorted, accent-folded titles.
+Typo-tolerant suggestions add a trigram inverted index (CSR postings):
+a title is scored by the share of the query's trigrams it contains.
+"""
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+from cinema.metrics import timed
+
+# Plus grand code point : borne haute de toutes les clés commençant par un préfixe.
+_MAX_CHAR = chr(0x10FFFF)
+
+DEFAULT_LIMIT = 20
+MIN_SIMILARITY = 0.5
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def fold(text):
+    """Lowercase ``text`` and strip its accents: ``'Amélie'`` -> ``'amelie'``."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def trigrams(key):
+    """Distinct trigrams of a folded key, padded so that word starts count: ``'up'`` -> ``{'  u', ' up', 'up '}``."""
+    padded = "  " + _SEPARATORS.sub(" ", key).strip() + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SortedKeys:
+    """Sorted keys stored as one UTF-8 buffer plus offsets, decoded on access.
+
+    A read-only sequence, enough for :mod:`bisect`: loading it from the
+    artifacts is a memory map instead of folding every title again.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_keys(cls, keys):
+        encoded = [key.encode("utf-8") for key in keys]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(key) for key in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+class TitleIndex:
+    """Sorted, accent-folded title keys with binary-search prefix lookup.
+
+    ``keys`` are the folded titles in sorted order and ``rows`` their
+    catalog rows. ``gram_indptr`` / ``gram_rows`` hold, for each trigram of
+    ``grams``, the rows whose title contains it; ``gram_counts`` is the
+    number of distinct trigrams of each row.
+    """
+
+    def __init__(self, keys, rows, grams, gram_indptr, gram_rows, gram_counts):
+        self.keys = keys
+        self.rows = rows
+        self.grams = grams
+        self.gram_indptr = gram_indptr
+        self.gram_rows = gram_rows
+        self.gram_counts = gram_counts
+
+    @classmethod
+    def from_titles(cls, titles):
+        """Build the index from the catalog titles (one fold per title: done by ``python -m cinema.build``)."""
+        keys = [fold(title) for title in titles]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+
+        grams = {}
+        gram_ids, gram_counts = [], []
+        for key in keys:
+            ids = [grams.setdefault(gram, len(grams)) for gram in trigrams(key)]
+            gram_ids.extend(ids)
+            gram_counts.append(len(ids))
+        gram_counts = np.array(gram_counts, dtype=np.int32)
+        gram_ids = np.array(gram_ids, dtype=np.int32)
+        postings = np.repeat(np.arange(len(keys), dtype=np.int32), gram_counts)
+        gram_indptr = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(grams)), out=gram_indptr[1:])
+        return cls(
+            SortedKeys.from_keys([keys[row] for row in order]),
+            np.array(order, dtype=np.int32),
+            grams,
+            gram_indptr,
+            postings[np.argsort(gram_ids, kind="stable")],
+            gram_counts,
+        )
+
+    @classmethod
+    def from_arrays(cls, gram_names, arrays):
+        """Rebuild the index from :attr:`gram_names` and the arrays saved by :meth:`arrays`."""
+        return cls(
+            SortedKeys(arrays["title_keys"], arrays["title_key_offsets"]),
+            arrays["title_rows"],
+            {gram: i for i, gram in enumerate(gram_names)},
+            arrays["title_gram_indptr"],
+            arrays["title_gram_rows"],
+            arrays["title_gram_counts"],
+        )
+
+    @property
+    def gram_names(self):
+        """Trigrams in id order, stored in the artifacts manifest."""
+        return sorted(self.grams, key=self.grams.__getitem__)
+
+    def arrays(self):
+        """Arrays stored in the model artifacts (see :data:`cinema.artifacts.TITLE_ARRAYS`)."""
+        return {
+            "title_keys": self.keys.data,
+            "title_key_offsets": self.keys.offsets,
+            "title_rows": self.rows,
+            "title_gram_indptr": self.gram_indptr,
+            "title_gram_rows": self.gram_rows,
+            "title_gram_counts": self.gram_counts,
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def exact(self, query):
+        """Rows whose folded title equals the folded ``query``, in row order."""
+        key = fold(query)
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_right(self.keys, key, lo)
+        return np.sort(self.rows[lo:hi])
+
+    @timed("search.prefix")
+    def prefix(self, query):
+        """Rows whose title starts with ``query``.
+
+        Returns ``(rows, n_exact)``: the first ``n_exact`` rows are exact
+        matches of the folded query, the rest are in title order.
+        """
+        key = fold(query)
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_right(self.keys, key + _MAX_CHAR, lo)
+        n_exact = bisect.bisect_right(self.keys, key, lo, hi) - lo
+        return self.rows[lo:hi], n_exact
+
+    def similar(self, query, min_similarity=MIN_SIMILARITY):
+        """Rows sharing trigrams with ``query``, most similar first, with their scores.
+
+        The score is the share of the query's trigrams found in the title, so
+        a title survives a typo or two and matches words in any position;
+        ties go to the title closest in length.
+        """
+        grams = trigrams(fold(query))
+        query_grams = [self.grams[gram] for gram in grams if gram in self.grams]
+        if not query_grams:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        postings = np.concatenate([self.gram_rows[self.gram_indptr[g]:self.gram_indptr[g + 1]] for g in query_grams])
+        shared = np.bincount(postings, minlength=len(self.gram_counts))
+        rows = np.flatnonzero(shared)
+        shared = shared[rows]
+        scores = (shared / len(grams)).astype(np.float32)
+        keep = scores >= min_similarity
+        rows, scores = rows[keep], scores[keep]
+        order = np.lexsort((np.abs(self.gram_counts[rows] - len(grams)), -scores))
+        return rows[order].astype(np.int32), scores[order]
+
+    @timed("search.suggest")
+    def suggest(self, query, limit=DEFAULT_LIMIT, rank=None, order=None):
+        """Up to ``limit`` rows for a search-as-you-type box.
+
+        Prefix matches come first (exact title first), then typo-tolerant
+        trigram matches. ``rank`` (e.g. recency) breaks ties between prefix
+        matches; without it they stay in title order. ``order`` is every
+        row sorted by ``rank`` (e.g. ``FilterIndex.recent_first``): an
+        empty query then returns its first rows instead of ranking the
+        whole catalog.
+        """
+        if order is not None and not fold(query):
+            return np.asarray(order[:limit], dtype=np.int32)
+        rows, n_exact = self.prefix(query)
+        exact, rest = rows[:n_exact], rows[n_exact:]
+        if rank is not None and len(rest):
+            if len(rest) > limit:
+                # Seules les `limit` meilleures lignes sont triées.
+                rest = rest[np.argpartition(rank[rest], limit - 1)[:limit]]
+            rest = rest[np.argsort(rank[rest], kind="stable")]
+        rows = np.concatenate([exact, rest])[:limit]
+        if len(rows) < limit and len(fold(query)) >= 3:
+            similar, _ = self.similar(query)
+            similar = similar[~np.isin(similar, rows)]
+            rows = np.concatenate([rows, similar[:limit - len(rows)]])
+        return rows.astype(np.int32)
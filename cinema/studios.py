@@ -0,0 +1,118 @@
+"""Many-to-many film / studio index.
+
+A film can have several production companies. The film -> studios
+relation is stored in CSR form (``indptr`` / ``indices`` int arrays), and
+the reverse studio -> films relation in the same layout, so both studio
+filtering and per-studio counts are vectorized and a film matches as soon
+as any of its studios is selected.
+
+Per-studio counts under a mask are popcounts for the few studios holding
+more than ``N / BITSET_SHARE`` films (packed bitsets, see
+:mod:`cinema.bitsets`) and one sparse matrix-vector product over the film
+lists of all the others.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from cinema import bitsets
+from cinema.catalog import STUDIO_COLUMN
+
+# Un studio de plus de N / BITSET_SHARE films est compté sur son bitset (N / 64 mots de 64 bits,
+# une dizaine d'opérations par mot sans np.bitwise_count) plutôt que film par film.
+BITSET_SHARE = 16
+
+
+def _csr_transpose(indptr, indices, n_columns):
+    """Reverse adjacency ``(indptr, indices)`` of a CSR row -> column relation."""
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    reverse_indptr = np.zeros(n_columns + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n_columns), out=reverse_indptr[1:])
+    return reverse_indptr, rows[order], rows
+
+
+class StudioIndex:
+    """``films -> studios`` (``indptr``, ``indices``) and ``studios -> films`` (``film_indptr``, ``films``)."""
+
+    def __init__(self, names, indptr, indices):
+        self.names = list(names)
+        self.indptr = np.asarray(indptr)
+        self.indices = np.asarray(indices)
+        self.film_indptr, self.films, self._rows = _csr_transpose(self.indptr, self.indices, len(self.names))
+        self._positions = {name: code for code, name in enumerate(self.names)}
+
+        self.sizes = np.diff(self.film_indptr)
+        self.large = np.flatnonzero(self.sizes > len(self) / BITSET_SHARE)
+        self.large_sets = bitsets.pack_rows(len(self), [self.films_of(code) for code in self.large])
+        # Listes de films des autres studios (celles des gros studios sont vidées) : studios × films.
+        small = np.ones(len(self.names), dtype=bool)
+        small[self.large] = False
+        kept = np.repeat(small, self.sizes)
+        small_indptr = np.zeros(len(self.names) + 1, dtype=np.int64)
+        np.cumsum(np.where(small, self.sizes, 0), out=small_indptr[1:])
+        self._small = sparse.csr_matrix(
+            (np.ones(int(kept.sum()), dtype=np.int32), self.films[kept], small_indptr),
+            shape=(len(self.names), len(self)),
+        )
+
+    @classmethod
+    def from_catalog(cls, df):
+        """Build the index from the cleaned ``", "``-joined studio column."""
+        codes, joined = pd.factorize(df[STUDIO_COLUMN].astype(object).fillna(""))
+        # Chaque combinaison de studios n'est découpée qu'une fois.
+        per_combination = [[name for name in value.split(", ") if name] for value in joined]
+        names = sorted({name for combination in per_combination for name in combination})
+        positions = {name: code for code, name in enumerate(names)}
+        combination_lengths = np.array([len(c) for c in per_combination], dtype=np.int64)
+        combination_indptr = np.zeros(len(per_combination) + 1, dtype=np.int64)
+        np.cumsum(combination_lengths, out=combination_indptr[1:])
+        combination_indices = np.array(
+            [positions[name] for combination in per_combination for name in combination], dtype=np.int32
+        )
+
+        lengths = np.where(codes >= 0, combination_lengths[codes], 0)
+        indptr = np.zeros(len(df) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        offsets = np.arange(indptr[-1]) - np.repeat(indptr[:-1], lengths) + np.repeat(combination_indptr[codes], lengths)
+        return cls(names, indptr, combination_indices[offsets])
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def codes(self, names):
+        """Codes of the known studios in ``names``."""
+        return np.array([self._positions[name] for name in names if name in self._positions], dtype=np.int32)
+
+    def studios_of(self, film):
+        return [self.names[code] for code in self.indices[self.indptr[film]:self.indptr[film + 1]]]
+
+    def films_of(self, code):
+        return self.films[self.film_indptr[code]:self.film_indptr[code + 1]]
+
+    def counts(self, mask=None):
+        """Number of films per studio, among the films selected by ``mask`` (default: all)."""
+        if mask is None:
+            return self.sizes
+        mask = np.asarray(mask, dtype=bool)
+        counts = (self._small @ mask.view(np.uint8)).astype(np.int64)
+        counts[self.large] = bitsets.popcounts(self.large_sets, bitsets.pack(mask))
+        return counts
+
+    def top(self, n=10, mask=None):
+        """Names of the ``n`` studios with the most films, most films first."""
+        counts = self.counts(mask)
+        order = np.argsort(-counts, kind="stable")[:n]
+        return [self.names[code] for code in order if counts[code] > 0]
+
+    def mask(self, names):
+        """Films made by at least one of the studios ``names``."""
+        mask = np.zeros(len(self), dtype=bool)
+        for code in self.codes(names):
+            large = np.searchsorted(self.large, code)
+            if large < len(self.large) and self.large[large] == code:
+                # Gros studio : dépaqueter son bitset coûte moins que d'écrire ses films un à un.
+                mask |= np.unpackbits(self.large_sets[large], count=len(self)).view(bool)
+            else:
+                mask[self.films_of(code)] = True
+        return mask
@@ -0,0 +1,219 @@
+"""Synthetic catalogs shaped like ``merged_data.csv`` and ``df_ML_modif.csv``.
+
+Usage::
+
+    python -m cinema.synthetic 100000                    # ./Data_base/{merged_data,df_ML_modif}.csv
+    python -m cinema.synthetic 5000000 --out /tmp/big --format parquet --seed 3
+
+Genres and studios follow Zipf laws (a few blockbusters, a long tail).
+About a third of the films have several studios, some studio names are
+quoted (``"Pixar", 'Walt Disney'``), and some titles and ``tconst`` are
+repeated, so the cleaning of :mod:`cinema.catalog` has real work to do.
+Rows are generated and written one chunk at a time, so memory stays
+constant whatever the size.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cinema import catalog
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+GENRES = ["Drama", "Comedy", "Action", "Thriller", "Romance", "Crime", "Horror", "Adventure", "Documentary",
+          "Animation", "Sci-Fi", "Fantasy", "Family", "Mystery", "Biography", "History", "Music", "War",
+          "Sport", "Musical", "Western", "News", "Film-Noir", "Reality-TV"]
+WORDS = ["Night", "Love", "City", "Dark", "Last", "King", "River", "Dream", "War", "House", "Secret", "Road",
+         "Blood", "Star", "Summer", "Ghost", "Lost", "Fire", "Moon", "Heart", "Été", "Amour", "Rêve", "Cœur",
+         "Étoile", "Forêt", "Mémoire", "Voyage", "Silence", "Empire", "Storm", "Island", "Shadow", "Promise"]
+SYLLABLES = ["pa", "ra", "mo", "un", "ver", "sal", "war", "ner", "co", "lum", "bia", "ga", "mont",
+             "fox", "lion", "gate", "dis", "ney", "pix", "ar", "stu", "dio", "ca", "nal", "plus"]
+SUFFIXES = ["Pictures", "Films", "Studios", "Productions", "Entertainment", "Media", "Cinéma", ""]
+
+# Parts des lignes « sales » que le nettoyage de cinema.catalog doit absorber.
+MULTI_STUDIO_RATE = 0.35
+QUOTED_STUDIO_RATE = 0.05
+DUPLICATE_TITLE_RATE = 0.03
+DUPLICATE_ROW_RATE = 0.01
+MISSING_RATE = 0.01
+
+
+def studio_names(n_studios, seed=0):
+    """``n_studios`` distinct, reproducible studio names."""
+    rng = np.random.default_rng([seed, 1])
+    names, seen = [], set()
+    while len(names) < n_studios:
+        parts = rng.choice(SYLLABLES, size=rng.integers(2, 4))
+        name = "".join(parts).capitalize()
+        suffix = SUFFIXES[rng.integers(len(SUFFIXES))]
+        name = f"{name} {suffix}".strip()
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return np.array(names, dtype=object)
+
+
+def _zipf_codes(rng, a, size, n):
+    """Zipf-distributed codes in ``[0, n)``: code 0 is the most frequent."""
+    return (rng.zipf(a, size=size) - 1) % n
+
+
+def generate_chunk(start, size, studios, n_keywords=2000, seed=0):
+    """Rows ``start:start + size`` of a synthetic catalog, with the columns of ``merged_data.csv``."""
+    rng = np.random.default_rng([seed, 2, start])
+    rows = np.arange(start, start + size)
+
+    genre_names = np.array(GENRES, dtype=object)
+    n_genres = rng.integers(1, 4, size=size)
+    genre_codes = _zipf_codes(rng, 1.5, (size, 3), len(GENRES))
+    genres = [",".join(dict.fromkeys(genre_names[codes[:count]])) for codes, count in zip(genre_codes, n_genres)]
+
+    n_studios = np.where(rng.random(size) < MULTI_STUDIO_RATE, rng.integers(2, 4, size=size), 1)
+    studio_codes = _zipf_codes(rng, 1.3, (size, 3), len(studios))
+    quoted = rng.random((size, 3)) < QUOTED_STUDIO_RATE
+    companies = []
+    for codes, count, quotes in zip(studio_codes, n_studios, quoted):
+        names = [f'"{studios[code]}"' if quote else studios[code] for code, quote in zip(codes[:count], quotes)]
+        companies.append(", ".join(dict.fromkeys(names)))
+
+    words = np.array(WORDS, dtype=object)
+    title_words = words[_zipf_codes(rng, 1.2, (size, 3), len(WORDS))]
+    n_words = rng.integers(1, 4, size=size)
+    # Les titres sont uniques grâce au numéro de ligne, sauf les « remakes » qui n'en ont pas :
+    # tirés des mêmes quelques mots, ils se répètent entre eux.
+    remakes = rng.random(size) < DUPLICATE_TITLE_RATE
+    titles = [" ".join(parts[:count]) + ("" if remake else f" {row}")
+              for parts, count, row, remake in zip(title_words, n_words, rows, remakes)]
+    tconst = np.array([f"tt{row:08d}" for row in rows], dtype=object)
+    duplicates = np.flatnonzero(rng.random(size) < DUPLICATE_ROW_RATE)
+    tconst[duplicates] = [f"tt{rng.integers(0, start + i + 1):08d}" for i in duplicates]
+
+    keywords = _zipf_codes(rng, 1.1, (size, 5), n_keywords)
+    combined = [
+        f"{g.replace(',', ' ')} {c.replace(',', ' ').replace(chr(34), '')} " + " ".join(f"kw{k}" for k in kws)
+        for g, c, kws in zip(genres, companies, keywords)
+    ]
+
+    df = pd.DataFrame({
+        "tconst": tconst,
+        "title": titles,
+        "genres": genres,
+        "production_companies_name_y": companies,
+        "averageRating": np.round(np.clip(rng.normal(6.3, 1.2, size), 1, 10), 1),
+        "startYear": (2024 - np.minimum(rng.exponential(25, size), 110)).astype(int).astype(float),
+        "runtimeMinutes": np.clip(rng.normal(100, 22, size), 40, 300).astype(int),
+        "poster_path_y": [f"/{row:x}synth.jpg" for row in rows],
+        "combined_features": combined,
+    }, index=rows)
+    for column in ("genres", "production_companies_name_y", "poster_path_y"):
+        df.loc[rng.random(size) < MISSING_RATE, column] = None
+    return df
+
+
+def generate(n, seed=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the catalog of ``n`` films as DataFrame chunks."""
+    studios = studio_names(max(50, min(n // 25, 50_000)), seed)
+    n_keywords = max(n // 5, 2000)
+    for start in range(0, n, chunk_size):
+        yield generate_chunk(start, min(chunk_size, n - start), studios, n_keywords, seed)
+
+
+def ml_columns(df):
+    """``df_ML_modif.csv`` has neither ``tconst`` nor ``runtimeMinutes``."""
+    return df.drop(columns=["tconst", "runtimeMinutes"])
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index_label="index")
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("writing Parquet needs pyarrow; use --format csv instead") from None
+        self._pq = pq
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df.rename_axis("index").reset_index(), preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def write_catalogs(directory, n, seed=0, fmt="csv", chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Write both sources of :data:`cinema.catalog.SOURCES` with ``n`` films under ``directory``.
+
+    Returns ``{catalog name: path}``. With ``fmt="parquet"`` the files get
+    a ``.parquet`` extension instead of ``.csv``.
+    """
+    paths, sinks = {}, {}
+    for name, source in catalog.SOURCES.items():
+        path = os.path.join(directory, os.path.basename(source["path"]))
+        if fmt == "parquet":
+            path = os.path.splitext(path)[0] + ".parquet"
+        os.makedirs(directory, exist_ok=True)
+        paths[name] = path
+        sinks[name] = _ParquetSink(path) if fmt == "parquet" else _CsvSink(path)
+    try:
+        done = 0
+        for chunk in generate(n, seed, chunk_size):
+            sinks["films"].write(chunk)
+            sinks["ml"].write(ml_columns(chunk))
+            done += len(chunk)
+            if progress is not None:
+                progress(done, n)
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    return paths
+
+
+def _progress(start):
+    def report(done, total):
+        print(f"\r{done}/{total} films ({time.perf_counter() - start:.1f}s)",
+              end="\n" if done == total else "", file=sys.stderr, flush=True)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cinema.synthetic", description=__doc__.split("\n")[0])
+    parser.add_argument("films", type=int, help="number of films")
+    parser.add_argument("--out", default=catalog.DATA_DIR, help="output directory")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows generated at a time")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+    progress = None if args.quiet else _progress(time.perf_counter())
+    paths = write_catalogs(args.out, args.films, seed=args.seed, fmt=args.format, chunk_size=args.chunk_size,
+                           progress=progress)
+    for name, path in sorted(paths.items()):
+        print(f"{name}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
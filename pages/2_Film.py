@@ -1,14 +1,11 @@
+import numpy as np
 import streamlit as st
-import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-@st.cache_data(show_spinner=False)
-def calculate_similarity(df):
-    cv = CountVectorizer()
-    count_matrix = cv.fit_transform(df['combined_features'])
-    cosine_sim = cosine_similarity(count_matrix)
-    return cosine_sim
+from cinema.debug import show_metrics_panel
+from cinema.facets import show_facets
+from cinema.gallery import show_gallery
+from cinema.resources import (load_catalog, load_filters, load_lookup, load_titles, poster_cache, poster_prefetcher,
+                              session_id)
+from cinema.result_cache import filters_key
 
 st.set_page_config(
     page_title="Titre de votre application",
@@ -68,23 +65,22 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-df = pd.read_csv("./Data_base/merged_data.csv")
-
-df['production_companies_name_y'] = df['production_companies_name_y'].str.split(',')
-df = df.explode('production_companies_name_y')
-df['production_companies_name_y'] = df['production_companies_name_y'].str.strip()
-df['production_companies_name_y'] = df['production_companies_name_y'].str.replace('"', '')
-df['production_companies_name_y'] = df['production_companies_name_y'].str.replace("'", '')
-df.drop_duplicates(subset="tconst", keep="first", inplace=True)
+df = load_catalog("films")
+filters = load_filters("films")
+titles = load_titles("films")
+lookup = load_lookup("films")
+posters = poster_cache()
+prefetcher = poster_prefetcher()
 
 if 'clicked_movie_tconst' not in st.session_state:
     st.session_state['clicked_movie_tconst'] = ""
 
 def show_movie_details(tconst):
-    movie = df[df['tconst'] == tconst].iloc[0]
+    movie = df.iloc[lookup.row_by_tconst[tconst]]
     col1, col2 = st.columns([1, 3])
     with col1:
-        st.image(f"https://image.tmdb.org/t/p/w900{movie['poster_path_y']}", use_column_width=True)
+        st.image(posters.url(movie['poster_path_y'], view="detail"), use_column_width=True)
+        prefetcher.fill([movie['poster_path_y']], view="detail")
     with col2:
         st.write(f"**Titre :** {movie['title']}")
         st.write(f"**Année :** {int(movie['startYear'])}")
@@ -92,29 +88,6 @@ def show_movie_details(tconst):
         st.write(f"**Genres :** {movie['genres']}")
         st.write(f"**Note :** {movie['averageRating']}")
 
-def title_from_index(index):
-    return df[df.index == index]["title"].values[0]
-
-def index_from_title(title):
-    return df[df.title == title]["index"].values[0]
-
-def find_similar_movies(movie_title, num_movies=5):
-    movie_index = index_from_title(movie_title)
-    similar_movies = list(enumerate(cosine_sim[movie_index]))
-    sorted_similar_movies = sorted(similar_movies, key=lambda x: x[1], reverse=True)[1:num_movies + 1]
-    return [title_from_index(element[0]) for element in sorted_similar_movies]
-
-def poster_url(title, df):
-    try:
-        poster_path = df[df['title'] == title]['poster_path_y'].values[0]
-        return 'https://image.tmdb.org/t/p/w500' + poster_path
-    except Exception as e:
-        st.error(f"Error for {title}: {str(e)}")
-        return None
-
-
-cosine_sim = calculate_similarity(df)
-
 # Sidebar: Filter Title
 st.sidebar.markdown(
     """
@@ -135,40 +108,35 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
-genres = df['genres'].str.get_dummies(sep=',').columns.tolist()
-genres_filter = st.sidebar.multiselect("Genre :", options=genres)
-
-df_filtered = df.copy()
-if genres_filter:
-    genre_mask = df_filtered['genres'].str.contains('|'.join(genres_filter))
-    df_filtered = df_filtered[genre_mask]
+genres_filter = st.sidebar.multiselect("Genre :", options=filters.genre_names)
 
-studio_counts = df['production_companies_name_y'].value_counts()
-top_studios = studio_counts.nlargest(10).index.tolist()
-other_studios = studio_counts.index[~studio_counts.index.isin(top_studios)].sort_values().tolist()
+top_studios = filters.top_studios(10)
+other_studios = sorted(set(filters.studio_names) - set(top_studios))
 studio_options = ['★ POPULAIRE ★'] + top_studios + ['-' * 54] + other_studios
 selected_studios = st.sidebar.multiselect("Studio :", options=studio_options)
 
 rating_range = st.sidebar.slider("Notes :", min_value=0.0, max_value=9.5, step=0.5, value=(0.0, 9.5), key="rating_slider")
+show_facets(filters, genres_filter, selected_studios, rating_range)
 
 min_rating = rating_range[0]
 max_rating = rating_range[1]
 
-df_filtered = df[(df['averageRating'] >= min_rating) & (df['averageRating'] <= max_rating)]
+mask = filters.mask(genres_filter, selected_studios, rating_range)
 
 search_query = st.text_input("", placeholder="Rechercher :", key="search_input")
 
-
-
 if search_query:
-    starts_with_mask = df_filtered['title'].str.lower().str.startswith(search_query.lower())
-    df_filtered = df_filtered[starts_with_mask]
-    df_filtered['starts_with'] = df_filtered['title'].str.lower().str.startswith(search_query.lower())
-    df_filtered['exact_match'] = df_filtered['title'].str.lower() == search_query.lower()
-    df_filtered = df_filtered.sort_values(by=['exact_match', 'starts_with', 'title'], ascending=[False, False, True])
+    # Titres commençant par la recherche : correspondances exactes d'abord, puis les plus récents
+    matches, n_exact = titles.prefix(search_query)
+    exact = np.arange(len(matches)) < n_exact
+    keep = mask[matches]
+    matches, exact = matches[keep], exact[keep]
+    filtered_ids = matches[np.lexsort((filters.recency_rank[matches], ~exact))]
+else:
+    filtered_ids = filters.recent(mask)
 
 # Ajoutez cette section pour gérer les différents cas d'affichage
-if len(df_filtered) == 0:
+if len(filtered_ids) == 0:
     st.markdown("### Film inconnu ou invalide ...")
 elif not genres_filter and not selected_studios and not (min_rating > 0.0 or max_rating < 9.5) and not search_query:
     st.markdown("### Derniers films populaires :")
@@ -191,28 +159,6 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-
-
-if search_query:
-    starts_with_mask = df_filtered['title'].str.lower().str.startswith(search_query.lower())
-    df_filtered = df_filtered[starts_with_mask]
-    df_filtered['starts_with'] = df_filtered['title'].str.lower().str.startswith(search_query.lower())
-    df_filtered['exact_match'] = df_filtered['title'].str.lower() == search_query.lower()
-    df_filtered = df_filtered.sort_values(by=['exact_match', 'starts_with', 'title'], ascending=[False, False, True])
-
-if genres_filter:
-    genre_mask = df_filtered['genres'].str.contains('|'.join(genres_filter))
-    df_filtered = df_filtered[genre_mask]
-
-if rating_range:
-    df_filtered = df_filtered[(df_filtered['averageRating'] >= min_rating) & (df_filtered['averageRating'] <= max_rating)]
-
-if selected_studios:
-    studio_mask = df_filtered['production_companies_name_y'].isin(selected_studios)
-    df_filtered = df_filtered[studio_mask]
-
-df_filtered = df_filtered.sort_values(by='startYear', ascending=False)
-
 num_movies_per_page = 52
 
 cols = st.sidebar.columns([4, 2, 3])
@@ -221,42 +167,28 @@ if 'page_state' not in st.session_state:
     st.session_state['page_state'] = "gallery"
     st.session_state['movies_shown'] = 52  # 52 films affichés initialement
 
+# La liste repart de 52 films quand les filtres ou la recherche changent
+movies_view = (filters_key(genres_filter, selected_studios, rating_range), search_query)
+if st.session_state.get('movies_view') != movies_view:
+    st.session_state['movies_view'] = movies_view
+    st.session_state['movies_shown'] = num_movies_per_page
+
 if st.session_state['page_state'] == "gallery":
 
-    cols = st.columns(4)
-    for i, movie_row in enumerate(df_filtered.iloc[:st.session_state['movies_shown']].itertuples()):
-        movie_data = movie_row  # Utilisez directement la ligne du DataFrame pour accéder aux données
-        movie_title = movie_row.title  # Accédez au titre du film
-        poster_url = f"https://image.tmdb.org/t/p/w500{movie_row.poster_path_y}"
-        with cols[i % 4]:
-            st.markdown(
-                f"""
-                <div style='margin: 0 0 20px 0; border: 1px solid white; border-radius: 16px; overflow: hidden;'>
-                    <!-- Display image -->
-                    <img src='{poster_url}' style='width: 100%;'>
-                    <!-- Display rating, title, and year under the image -->
-                    <div style='background-color: black; padding: 10px; min-height: 165px;'>
-                        <div style='text-align: left; color: white;'>
-                            <span style='color: gold; font-size: 22px;'>★</span> <span style='font-size: 16px;'>{movie_data.averageRating}</span>
-                        </div>
-                        <div style='text-align: left; color: white; font-weight: bold;'>
-                            {movie_title}
-                        </div>
-                        <div style='text-align: left; color: white;'>
-                            ({int(movie_data.startYear)})
-                        </div>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-            
-        if (i + 1) % 4 == 0:
-            cols = st.columns(4)
-    
-    if len(df_filtered) > st.session_state['movies_shown']:
+    # Un seul accès vectorisé, puis une grille HTML par tranche de 52 films
+    cards = lookup.take(filtered_ids[:st.session_state['movies_shown']])
+    show_gallery(cards, page_size=num_movies_per_page, variant="film", posters=posters, prefetcher=prefetcher)
+
+    # Vignettes de la page suivante téléchargées en arrière-plan (annule celles d'une sélection précédente)
+    shown = st.session_state['movies_shown']
+    next_ids = filtered_ids[shown:shown + num_movies_per_page]
+    prefetcher.warm(session_id(), lookup.take(next_ids)["poster_path"])
+
+    if len(filtered_ids) > st.session_state['movies_shown']:
         if st.button("Afficher plus", key='unique_key_afficher_plus'):
-            st.session_state['movies_shown'] += 52  # Ajoute 52 films supplémentaires
+            # Ajoute 52 films supplémentaires
+            st.session_state['movies_shown'] = min(st.session_state['movies_shown'] + num_movies_per_page, len(filtered_ids))
             st.experimental_rerun()
 
-
+# Panneau de mesures (uniquement si MGC_METRICS est défini)
+show_metrics_panel('2_Film')
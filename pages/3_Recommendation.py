@@ -1,9 +1,14 @@
 
 
+import numpy as np
 import streamlit as st
-import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from cinema.catalog import version as catalog_version
+from cinema.debug import show_metrics_panel
+from cinema.facets import show_facets
+from cinema.gallery import show_gallery
+from cinema.resources import (load_engine, load_filters, load_lookup, load_titles, poster_cache, poster_prefetcher,
+                              result_cache, session_id)
+from cinema.result_cache import filters_key
 
 # ----------------------- CONFIGURATION -----------------------
 st.set_page_config(page_title="Recommandation de Films", layout="wide")
@@ -18,57 +23,34 @@ hide_streamlit_style = """
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
 # ----------------------- LOAD DATA -----------------------
-@st.cache_data(show_spinner=False)
-def load_data():
-    df = pd.read_csv("./Data_base/df_ML_modif.csv").drop_duplicates(subset="title", keep='first')
-    df['production_companies_name_y'] = df['production_companies_name_y'].str.replace('"', '').str.replace("'", '')
-    return df
+filters = load_filters("ml")
+titles = load_titles("ml")
+lookup = load_lookup("ml")
+posters = poster_cache()
+prefetcher = poster_prefetcher()
+results = result_cache()
+engine = load_engine("ml")
 
-df = load_data()
+# ----------------------- UTILITY FUNCTIONS -----------------------
+def title_from_index(index):
+    return lookup.title(index)
 
-@st.cache_data(show_spinner=False)
-def calculate_cosine_similarity(df):
-    cv = CountVectorizer()
-    count_matrix = cv.fit_transform(df['combined_features'])
-    return cosine_similarity(count_matrix)
+def index_from_title(title):
+    return lookup.row(title)
 
-cosine_sim = calculate_cosine_similarity(df)
+def find_similar_movies(movie_title, num_movies, genres_filter, selected_studios, rating_range):
+    # Les filtres sont appliqués avant le classement : on obtient num_movies films éligibles
+    movie_index = index_from_title(movie_title)
+    similar_ids, _ = engine.recommend(movie_index, num_movies, genres_filter, selected_studios, rating_range)
+    return similar_ids
 
-# ----------------------- UTILITY FUNCTIONS -----------------------
-def title_from_index(index, df):
-    return df[df.index == index]["title"].values[0]
-
-def index_from_title(title, df):
-    return df[df.title.str.lower() == title.lower()]["index"].values[0]
-
-def find_similar_movies(movie_title, num_movies, df, cosine_sim, genres_filter, selected_studios, rating_range):
-    movie_index = index_from_title(movie_title, df)
-    similar_movies = list(enumerate(cosine_sim[movie_index]))
-    sorted_similar_movies = sorted(similar_movies, key=lambda x: x[1], reverse=True)[1:num_movies + 1]
-    filtered_movies = []
-    for idx, sim_score in sorted_similar_movies:
-        movie = df.iloc[idx]
-        genres = set(movie['genres'].split(','))
-        studio = movie['production_companies_name_y']
-        rating = movie['averageRating']
-        if (not genres_filter or genres.intersection(genres_filter)) and \
-           (not selected_studios or studio in selected_studios) and \
-           rating_range[0] <= rating <= rating_range[1]:
-            filtered_movies.append(idx)
-    return [title_from_index(idx, df) for idx in filtered_movies]
-
-# Ajoutez une fonction pour mettre à jour les films recommandés en fonction des filtres
+# Ajoutez une fonction pour mettre à jour les films recommandés en fonction des filtres.
+# La liste classée complète est mise en cache : "Afficher plus" n'en lit qu'une tranche.
 def update_filtered_movies(selected_movie, genres_filter, selected_studios, rating_range):
-    all_similar_movies = find_similar_movies(selected_movie, 100, df, cosine_sim, genres_filter, selected_studios, rating_range)
-    return all_similar_movies
-
-def poster_url(title, df):
-    try:
-        poster_path = df[df['title'] == title]['poster_path_y'].values[0]
-        return 'https://image.tmdb.org/t/p/w500' + poster_path
-    except Exception as e:
-        st.error(f"Error for {title}: {str(e)}")
-        return None
+    key = (index_from_title(selected_movie), filters_key(genres_filter, selected_studios, rating_range), catalog_version("ml"))
+    return results.get_or_compute(
+        key, lambda: find_similar_movies(selected_movie, 100, genres_filter, selected_studios, rating_range)
+    )
 
 # ----------------------- STYLES -----------------------
 st.markdown(
@@ -141,31 +123,16 @@ st.sidebar.markdown(
 )
 
 # Sidebar: Genre Filter
-genres = df['genres'].str.get_dummies(sep=',').columns.tolist()
-genres_filter = st.sidebar.multiselect("Genre :", options=genres)
-
-# Obtenez la liste des noms de studios
-studio_names = df['production_companies_name_y'].unique().tolist()
-
-# Supprimez les guillemets de chaque nom de studio
-studio_names_no_quotes = [name.replace('"', '') for name in studio_names]
-
-# Triez les studios par compte
-studio_counts = df['production_companies_name_y'].value_counts()
+genres_filter = st.sidebar.multiselect("Genre :", options=filters.genre_names)
 
 # Obtenez les 10 studios les plus populaires
-top_studios = studio_counts.nlargest(10).index.tolist()
-top_studios_no_quotes = [name.replace('"', '') for name in top_studios]
+top_studios = filters.top_studios(10)
 
-# Obtenez les autres studios
-other_studios = studio_counts.index[~studio_counts.index.isin(top_studios)].tolist()
-other_studios_no_quotes = [name.replace('"', '') for name in other_studios]
-
-# Triez les autres studios
-other_studios_no_quotes.sort()
+# Obtenez les autres studios, triés
+other_studios = sorted(set(filters.studio_names) - set(top_studios))
 
 # Créez la liste des options de studio pour le filtre
-studio_options = ['★ POPULAIRE ★'] + top_studios_no_quotes + ['-' * 54] + other_studios_no_quotes
+studio_options = ['★ POPULAIRE ★'] + top_studios + ['-' * 54] + other_studios
 
 # Affichez le filtre
 selected_studios = st.sidebar.multiselect("Studio", options=studio_options)
@@ -176,6 +143,7 @@ if '★ POPULAIRE ★' in selected_studios:
 
 # Sidebar: Rating Filter
 rating_range = st.sidebar.slider("Notes :", min_value=0.0, max_value=9.5, step=0.5, value=(0.0, 9.5), key="rating_slider")
+show_facets(filters, genres_filter, selected_studios, rating_range)
 
 
 # CSS styles
@@ -207,8 +175,6 @@ st.markdown(
 )
 
 # UI: Widgets
-sorted_movies = df.sort_values(by="startYear", ascending=False)["title"].tolist()
-
 # Create columns to align the Start button, search, and Clear button on the same row.
 cols = st.columns([1, 9, 0.5])
 
@@ -234,9 +200,6 @@ with cols[0]:
         st.session_state.recommendation_started = True
     st.markdown("</div>", unsafe_allow_html=True)
 
-# Modification: Only show movies from 2020 and later
-sorted_movies = df.sort_values(by="startYear", ascending=False)["title"].tolist()
-
 # Place the movie selection in the second column.
 with cols[1]:
     st.markdown("""
@@ -248,17 +211,22 @@ with cols[1]:
         <div class="search-bar">
     """, unsafe_allow_html=True)
     
-    # Initialize selected_movie to an empty list outside of the if block
-    selected_movie = []
-    
-    suggestions = sorted_movies  
-    
-    # Update selected_movie inside the if block
+    # Recherche côté serveur : seules les 20 meilleures correspondances sont envoyées au navigateur
+    # (les plus récentes quand la recherche est vide).
+    query = st.text_input(
+        "Commencez par choisir votre film préféré: (Example: Avatar)",
+        key=f'search_query_{st.session_state.clear_click_count}'
+    )
+    suggestions = [title_from_index(row) for row in titles.suggest(query, limit=20, rank=filters.recency_rank,
+                                                                     order=filters.recent_first)]
+
+    # La clé suit la recherche : une nouvelle recherche présélectionne sa meilleure correspondance.
     selected_movie = st.selectbox(
-        "Commencez par choisir votre film préféré: (Example: Avatar)", 
-        [''] + suggestions, 
-        index=0,
-        key=f'search_bar_{st.session_state.clear_click_count}'
+        "Films correspondants",
+        [''] + suggestions,
+        index=1 if query and suggestions else 0,
+        key=f'search_bar_{st.session_state.clear_click_count}_{query}',
+        label_visibility="collapsed"
     )
     
     # Add the following code to reset relevant states when a new movie is selected
@@ -267,14 +235,24 @@ with cols[1]:
        st.session_state.get('rating_range') != rating_range:
         st.session_state.recommendation_started = False  # Reset the recommendation
         st.session_state.start_index = 0  # Reset the start index for displayed movies
-        st.session_state.displayed_movies = []  # Clear the displayed movies
+        st.session_state.displayed_movies = np.empty(0, dtype=np.int32)  # Clear the displayed movies
         st.session_state.current_page = 1  # Reset the current page
         # Update st.session_state with the new filter values
         st.session_state['genres_filter'] = genres_filter
         st.session_state['selected_studios'] = selected_studios
         st.session_state['rating_range'] = rating_range
 
-        
+    # Un autre film (choisi ou présélectionné par une nouvelle recherche) repart de zéro :
+    # ses recommandations ne s'affichent qu'après un clic sur Start.
+    selected_row = index_from_title(selected_movie) if selected_movie else None
+    if st.session_state.get('selected_row') != selected_row:
+        st.session_state.recommendation_started = False
+        st.session_state.start_index = 0
+        st.session_state.displayed_movies = np.empty(0, dtype=np.int32)
+        st.session_state.current_page = 1
+        st.session_state['selected_row'] = selected_row
+
+
         
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -294,7 +272,7 @@ with cols[2]:
         st.session_state.selected_movie = ''
         st.session_state.recommendation_started = False
         st.session_state.start_index = 0
-        st.session_state.displayed_movies = []
+        st.session_state.displayed_movies = np.empty(0, dtype=np.int32)
         st.session_state.search_bar_input = ''
         st.session_state.current_page = 1
         st.session_state.last_displayed_index = 0
@@ -319,7 +297,8 @@ if 'start_index' not in st.session_state:
 if 'search_bar_input' not in st.session_state:
     st.session_state.search_bar_input = ''
 if 'displayed_movies' not in st.session_state:
-    st.session_state.displayed_movies = []
+    # Identifiants int32 des films affichés : 4 octets par film dans l'état de la session
+    st.session_state.displayed_movies = np.empty(0, dtype=np.int32)
 
     
 # UI: Displaying Movies
@@ -334,37 +313,25 @@ if st.session_state.recommendation_started and selected_movie and len(selected_m
     end_index = start_index + movies_per_page
 
     # Add the next set of movies to displayed_movies
-    st.session_state.displayed_movies.extend(all_similar_movies[start_index:end_index])
-
-    cols = st.columns(4)
-    for i, movie_title in enumerate(st.session_state.displayed_movies):  # Change here to use displayed_movies
-        movie_data = df[df["title"] == movie_title].iloc[0]
-        with cols[i % 4]:
-            st.markdown(
-                f"""
-                <div style='margin: 0 0 20px 0; border: 1px solid #9E9E9E; border-radius: 16px; overflow: hidden;'>
-                    <div style='height: 300px; overflow: hidden;'>
-                        <img src='{poster_url(movie_title, df)}' style='width: 100%; height: 100%; object-fit: cover;'>
-                    </div>
-                    <div style='background-color: black; padding: 10px; min-height: 185px;'>
-                        <div style='text-align: left; color: white;'>
-                            <span style='color: gold; font-size: 22px;'>★</span> <span style='font-size: 16px;'>{movie_data['averageRating']}</span>
-                        </div>
-                        <div style='text-align: left; color: white; font-weight: bold;'>
-                            {movie_title}
-                        </div>
-                        <div style='text-align: left; color: white;'>
-                            ({int(movie_data['startYear'])})
-                        </div>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    st.session_state.displayed_movies = np.concatenate(
+        [st.session_state.displayed_movies, all_similar_movies[start_index:end_index]]
+    ).astype(np.int32)
+
+    # Un seul accès vectorisé pour toutes les cartes affichées
+    cards = lookup.take(st.session_state.displayed_movies)
+
+    show_gallery(cards, page_size=movies_per_page, variant="cover", posters=posters, prefetcher=prefetcher)
+
+    # Vignettes de la page suivante téléchargées en arrière-plan (annule celles d'une sélection précédente)
+    next_ids = all_similar_movies[end_index:end_index + movies_per_page]
+    prefetcher.warm(session_id(), lookup.take(next_ids)["poster_path"])
 
     if len(st.session_state.displayed_movies) < len(all_similar_movies):  # Change the condition here
         if st.button("Afficher plus"):
             st.experimental_rerun()
+else:
+    # Plus de galerie : les téléchargements en attente de cette session sont inutiles
+    prefetcher.cancel(session_id())
 
-
-
+# Panneau de mesures (uniquement si MGC_METRICS est défini)
+show_metrics_panel('3_Recommendation')
@@ -1,7 +1,9 @@
+import numpy as np
 import streamlit as st
-import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from cinema.debug import show_metrics_panel
+from cinema.facets import show_facets
+from cinema.gallery import show_gallery
+from cinema.resources import load_filters, load_lookup, load_sampler, poster_cache, poster_prefetcher
 
 # Configuration de la page Streamlit
 st.set_page_config(
@@ -90,94 +92,46 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
-# Chargement des données
-@st.cache_data(show_spinner=False)
-def load_data():
-    return pd.read_csv("./Data_base/df_ML_modif.csv").drop_duplicates(subset="title", keep='first')
+# Chargement des index (partagés par toutes les sessions)
+filters = load_filters("ml")
+lookup = load_lookup("ml")
+sampler = load_sampler("ml")
+posters = poster_cache()
+prefetcher = poster_prefetcher()
 
-# Prétraitement des studios
-@st.cache_data(show_spinner=False)
-def preprocess_studios(df):
-    return (
-        df['production_companies_name_y']
-        .str.replace('"', '')
-        .str.split(',')
-        .explode()
-        .str.strip()
-    )
-
-# Calcul de la similarité cosinus
-@st.cache_data(show_spinner=False)
-def calculate_cosine_similarity(df):
-    cv = CountVectorizer()
-    count_matrix = cv.fit_transform(df['combined_features'])
-    return cosine_similarity(count_matrix)
-
-# Chargement et prétraitement des données
-df = load_data()
-cosine_sim = calculate_cosine_similarity(df)
-studios = preprocess_studios(df)
+WEIGHTING_LABELS = {"uniform": "Au hasard", "rating": "Plutôt bien notés", "popularity": "Plutôt populaires"}
 
 
 # Interface utilisateur: Filtres
-genres = df['genres'].str.get_dummies(sep=',').columns.tolist()
-genres_filter = st.sidebar.multiselect("Filtrer par genre", options=genres)
+genres_filter = st.sidebar.multiselect("Filtrer par genre", options=filters.genre_names)
 
-studio_options = ['⭐️ POPULAIRE ⭐️'] + studios.value_counts().nlargest(10).index.tolist() + ['-' * 54] + studios.unique().tolist()
+top_studios = filters.top_studios(10)
+other_studios = sorted(set(filters.studio_names) - set(top_studios))
+studio_options = ['⭐️ POPULAIRE ⭐️'] + top_studios + ['-' * 54] + other_studios
 selected_studios = st.sidebar.multiselect("Studio", options=studio_options)
 
 rating_range = st.sidebar.slider("Notes :", min_value=0.0, max_value=9.5, step=0.5, value=(0.0, 9.5), key="rating_slider")
+show_facets(filters, genres_filter, selected_studios, rating_range)
+
+weighting = st.sidebar.selectbox("Tirage :", options=sampler.weightings, format_func=WEIGHTING_LABELS.get)
+seed = st.sidebar.number_input("Graine (0 = aléatoire) :", min_value=0, value=0, step=1)
 
-# Fonction pour obtenir l'URL du poster
-@st.cache_data(show_spinner=False)
-def poster_url(title):
-    poster_path = df[df['title'] == title]['poster_path_y'].values[0]
-    return f'https://image.tmdb.org/t/p/w500{poster_path}'
+# Générateur et films déjà vus propres à la session ; une graine fixée rend la suite de tirages reproductible.
+if st.session_state.get('discovery_seed') != seed or 'discovery_rng' not in st.session_state:
+    st.session_state['discovery_seed'] = seed
+    st.session_state['discovery_rng'] = np.random.default_rng(seed or None)
+    st.session_state['discovery_seen'] = np.empty(0, dtype=np.int32)
 
 # Génération de films aléatoires
 if st.button("👉 Générer des films aléatoires", key="random_button"):
-    random_df_filtered = df.copy()
-
-    # Appliquer les filtres
-    if genres_filter:
-        random_df_filtered = random_df_filtered[random_df_filtered['genres'].str.contains('|'.join(genres_filter))]
-    
-    if selected_studios:
-        # Note: il peut être nécessaire de répéter le prétraitement ici si votre implémentation du filtre le nécessite
-        random_df_filtered = random_df_filtered[random_df_filtered['production_companies_name_y'].isin(selected_studios)]
-    
-    random_df_filtered = random_df_filtered[
-        (random_df_filtered['averageRating'] >= rating_range[0]) & 
-        (random_df_filtered['averageRating'] <= rating_range[1])
-    ]
-
-    # Sélectionner aléatoirement des films
-    num_random_movies = min(8, len(random_df_filtered))
-    random_movies = random_df_filtered.sample(n=num_random_movies)
+    # Tirer 8 films parmi ceux qui passent les filtres, sans répétition dans la session
+    bucket = sampler.bucket(genres_filter, selected_studios, rating_range)
+    random_movies, st.session_state['discovery_seen'] = sampler.draw(
+        bucket, 8, st.session_state['discovery_rng'], seen=st.session_state['discovery_seen'], weighting=weighting
+    )
 
     # Afficher les films
-    cols = st.columns(4)
-    for i, movie in enumerate(random_movies.itertuples()):
-        with cols[i % 4]:
-            st.markdown(
-                f"""
-                <div style='margin: 0 0 20px 0; border: 1px solid #9E9E9E; border-radius: 16px; overflow: hidden;'>
-                    <div style='height: 300px; overflow: hidden;'>
-                        <img src='{poster_url(movie.title)}' style='width: 100%; height: 100%; object-fit: cover;'>
-                    </div>
-                    <div style='background-color: black; padding: 10px; min-height: 185px;'>
-                        <div style='text-align: left; color: white;'>
-                            <span style='color: gold; font-size: 22px;'>★</span> <span style='font-size: 16px;'>{movie.averageRating}</span>
-                        </div>
-                        <div style='text-align: left; color: white; font-weight: bold;'>
-                            {movie.title}
-                        </div>
-                        <div style='text-align: left; color: white;'>
-                            ({int(movie.startYear)})
-                        </div>
-                    </div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    show_gallery(lookup.take(random_movies), page_size=8, variant="cover", posters=posters, prefetcher=prefetcher)
 
+# Panneau de mesures (uniquement si MGC_METRICS est défini)
+show_metrics_panel('4_Découverte_aléatoire')
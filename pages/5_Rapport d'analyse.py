@@ -1,7 +1,7 @@
-
 import streamlit as st
-import fitz
-from PIL import Image
+from cinema.debug import show_metrics_panel
+from cinema.report import file_key
+from cinema.resources import report_page, report_page_count
 
 # Définir les paramètres de configuration de la page
 st.set_page_config(
@@ -12,6 +12,9 @@ st.set_page_config(
 # Chemin vers votre fichier PDF
 pdf_path = "./Analyse_Power_BI_Project_2.pdf"
 
+# Résolution de rendu des pages
+dpi = 72
+
 # Textes personnalisés pour chaque image
 custom_texts = [
     "Parmi le Top 100",
@@ -20,19 +23,19 @@ custom_texts = [
     "Productions et budgets"
 ]
 
-# Ouvrir le fichier PDF avec PyMuPDF
-pdf = fitz.open(pdf_path)
+# Chemin absolu et date de modification : une nouvelle version du PDF invalide le cache
+pdf_file, pdf_mtime = file_key(pdf_path)
+sections = custom_texts[:report_page_count(pdf_file, pdf_mtime)]
 
-# Parcourir les pages du PDF
-for page_number in range(len(pdf)):
-    # Extraire l'image de la page en tant que tableau Numpy
-    page = pdf.load_page(page_number)
-    pix = page.get_pixmap()
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+# Seule la section choisie est rendue (puis mise en cache pour toutes les sessions)
+section = st.radio("Section :", sections, horizontal=True, label_visibility="collapsed")
+page_number = sections.index(section)
 
-    # Afficher le texte personnalisé avec une taille de police augmentée et centrée
-    st.markdown(f"## <center>{custom_texts[page_number]}</center>", unsafe_allow_html=True)
+# Afficher le texte personnalisé avec une taille de police augmentée et centrée
+st.markdown(f"## <center>{section}</center>", unsafe_allow_html=True)
 
-    # Afficher l'image dans Streamlit
-    st.image(img)
+# Afficher l'image dans Streamlit
+st.image(report_page(pdf_file, pdf_mtime, page_number, dpi))
 
+# Panneau de mesures (uniquement si MGC_METRICS est défini)
+show_metrics_panel("5_Rapport d'analyse")
@@ -0,0 +1,54 @@
+"""Catalog cleaning and the studio index built from it."""
+import numpy as np
+import pandas as pd
+
+from cinema import catalog as catalog_module, synthetic
+from cinema.catalog import STUDIO_COLUMN, clean_catalog, split_studios
+from cinema.facets import facet_lines
+from cinema.filters import FilterIndex
+
+
+def catalog(studios):
+    return clean_catalog(pd.DataFrame({
+        "title": [f"Film {i}" for i in range(len(studios))],
+        "genres": ["Animation"] * len(studios),
+        STUDIO_COLUMN: studios,
+        "averageRating": [7.0] * len(studios),
+        "startYear": [2000 + i for i in range(len(studios))],
+        "poster_path_y": [""] * len(studios),
+        "combined_features": [""] * len(studios),
+    }), "title")
+
+
+def test_split_studios_unquotes_and_dedupes():
+    assert split_studios('"Pixar", Pixar, \'Walt Disney\', ') == ["Pixar", "Walt Disney"]
+    assert split_studios(None) == []
+
+
+def test_a_studio_listed_twice_counts_one_film():
+    filters = FilterIndex.from_catalog(catalog(['"Pixar", Pixar', "Pixar, Walt Disney", "Walt Disney"]))
+    counts = dict(zip(filters.studio_names, np.asarray(filters.facets().studios).tolist()))
+    assert counts == {"Pixar": 2, "Walt Disney": 2}
+    assert filters.top_studios(1) == ["Pixar"]
+    assert filters.mask(studios=["Pixar"]).tolist() == [True, True, False]
+
+
+def test_model_text_is_only_loaded_for_the_build(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    synthetic.write_catalogs(catalog_module.DATA_DIR, 300, seed=1)
+    for _ in range(2):  # CSV nettoyé, puis copie Parquet
+        assert "combined_features" not in catalog_module.load("ml").columns
+        full = catalog_module.load("ml", features=True)
+        assert "combined_features" in full.columns and len(full) == len(catalog_module.load("ml"))
+
+
+def test_facet_lines_show_the_selection_then_the_largest_counts():
+    names = ["A", "B", "C", "D", "E"]
+    counts = np.array([3, 5, 0, 3, 1])
+    lines = facet_lines(names, counts, selected=[2], limit=2)
+    assert lines == [
+        "<span class='mgc-zero'><b>C</b> (0)</span>",
+        "<span>B (5)</span>",
+        "<span>A (3)</span>",  # ex æquo avec D : ordre des codes
+    ]
+    assert len(facet_lines(names, counts)) == 4
@@ -0,0 +1,112 @@
+"""Discovery draws: reproducible, no repeats until a bucket is used up."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from cinema.catalog import STUDIO_COLUMN, clean_catalog
+from cinema.discovery import DiscoverySampler
+from cinema.filters import FilterIndex
+
+N_FILMS = 40
+
+
+@pytest.fixture
+def sampler():
+    ratings = np.linspace(2.0, 9.0, N_FILMS).round(1)
+    ratings[:5] = 0  # jamais tirés avec la pondération par note
+    df = clean_catalog(pd.DataFrame({
+        "title": [f"Film {i}" for i in range(N_FILMS)],
+        "genres": ["Drama" if i % 2 else "Comedy" for i in range(N_FILMS)],
+        STUDIO_COLUMN: ["Pixar"] * N_FILMS,
+        "averageRating": ratings,
+        "startYear": [2000 + i for i in range(N_FILMS)],
+        "poster_path_y": [""] * N_FILMS,
+        "combined_features": [""] * N_FILMS,
+    }), "title")
+    return DiscoverySampler(FilterIndex.from_catalog(df))
+
+
+def draws(sampler, bucket, k, seed, n, weighting="uniform"):
+    rng = np.random.default_rng(seed)
+    seen = None
+    result = []
+    for _ in range(n):
+        chosen, seen = sampler.draw(bucket, k, rng, seen, weighting)
+        result.append(chosen.tolist())
+    return result
+
+
+def test_a_seeded_sampler_repeats_its_draws(sampler):
+    bucket = sampler.bucket()
+    for weighting in ("uniform", "rating"):
+        assert draws(sampler, bucket, 6, 7, 10, weighting) == draws(sampler, bucket, 6, 7, 10, weighting)
+    assert draws(sampler, bucket, 6, 7, 3) != draws(sampler, bucket, 6, 8, 3)
+
+
+def test_no_repeats_until_the_bucket_is_used_up_then_it_starts_over(sampler):
+    bucket = sampler.bucket(genres=["Drama"])
+    assert len(bucket) == N_FILMS // 2
+    rng = np.random.default_rng(0)
+    seen = None
+    drawn = []
+    for _ in range(4):
+        chosen, seen = sampler.draw(bucket, 5, rng, seen)
+        assert chosen.dtype == np.int32 and len(chosen) == 5
+        drawn.extend(chosen.tolist())
+        assert seen.tolist() == sorted(drawn)
+    assert sorted(drawn) == bucket.ids.tolist()
+
+    # Bucket épuisé : le tirage repart de zéro, ses films sortent de ``seen``.
+    chosen, seen = sampler.draw(bucket, 5, rng, seen)
+    assert len(set(chosen.tolist())) == 5 and set(chosen.tolist()) <= set(bucket.ids.tolist())
+    assert seen.tolist() == sorted(chosen.tolist())
+
+
+def test_restart_keeps_the_films_seen_in_other_buckets(sampler):
+    drama, comedy = sampler.bucket(genres=["Drama"]), sampler.bucket(genres=["Comedy"])
+    rng = np.random.default_rng(1)
+    seen = np.sort(comedy.ids[:3])
+    # Deux films inédits pour trois demandés : le bucket repart de zéro.
+    seen = np.union1d(seen, drama.ids[2:]).astype(np.int32)
+    chosen, seen = sampler.draw(drama, 3, rng, seen)
+    assert len(set(chosen.tolist())) == 3
+    assert seen.tolist() == sorted(comedy.ids[:3].tolist() + chosen.tolist())
+
+
+def test_the_last_unseen_films_are_drawn_exactly(sampler, monkeypatch):
+    bucket = sampler.bucket()
+    unseen = bucket.ids[[4, 17, 31]]
+    seen = np.setdiff1d(bucket.ids, unseen).astype(np.int32)
+    # Presque tout est vu : le rejet abandonne et le tirage exact prend le relais.
+    assert DiscoverySampler._reject(bucket, 3, np.random.default_rng(0), seen, None, max_rounds=1) is None
+    for weighting in ("uniform", "rating"):
+        chosen, _ = sampler.draw(bucket, 3, np.random.default_rng(2), seen, weighting)
+        assert sorted(chosen.tolist()) == unseen.tolist()
+
+    # Tant que le bucket est largement inédit, le rejet suffit.
+    monkeypatch.setattr(DiscoverySampler, "_exact", staticmethod(lambda *args: pytest.fail("exact draw")))
+    chosen, _ = sampler.draw(bucket, 5, np.random.default_rng(3))
+    assert len(set(chosen.tolist())) == 5
+
+
+def test_rating_weighting_skips_unrated_films_while_it_can(sampler):
+    bucket = sampler.bucket()
+    unrated = set(bucket.ids[sampler.filters.rating[bucket.ids] == 0].tolist())
+    assert len(unrated) == 5
+    for chosen in draws(sampler, bucket, 7, 4, 5, "rating"):
+        assert not unrated & set(chosen)
+    # Moins de films notés que demandés : le tirage exact redevient uniforme.
+    rated = np.setdiff1d(bucket.ids, list(unrated))
+    seen = rated[2:].astype(np.int32)
+    chosen, _ = sampler.draw(bucket, 7, np.random.default_rng(5), seen, "rating")
+    assert sorted(chosen.tolist()) == sorted(unrated | set(rated[:2].tolist()))
+
+
+def test_an_empty_bucket_draws_nothing(sampler):
+    bucket = sampler.bucket(genres=["Drama"], rating_range=(9.5, 10.0))
+    assert len(bucket) == 0
+    seen = np.array([1, 2], dtype=np.int32)
+    for weighting in ("uniform", "rating"):
+        chosen, after = sampler.draw(bucket, 5, np.random.default_rng(0), seen, weighting)
+        assert chosen.dtype == np.int32 and len(chosen) == 0
+        assert after.tolist() == [1, 2]
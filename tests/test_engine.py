@@ -0,0 +1,72 @@
+"""Batch recommendations against :meth:`Engine.recommend`, one query at a time."""
+import numpy as np
+import pytest
+
+from cinema import build, catalog, synthetic
+from cinema.engine import Engine, Query
+from cinema.filters import FilterIndex
+
+N_FILMS = 300
+K = 8
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("data")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(directory)
+        synthetic.write_catalogs(catalog.DATA_DIR, N_FILMS, seed=3)
+        df = catalog.load("ml", features=True)
+    features, _, neighbors = build.build_model(df, k=K)
+    return Engine(features, neighbors, FilterIndex.from_catalog(df), df["title"])
+
+
+def queries(engine):
+    """Every few films under each filter combination, the combinations interleaved."""
+    genre = engine.filters.genre_names[0]
+    studios = engine.filters.top_studios(2)
+    keys = [
+        (None, None, None),
+        ([genre], None, None),
+        (None, studios, None),
+        (None, None, (6.0, 9.5)),
+        ([genre], studios[:1], (0.0, 9.5)),
+        (None, None, (0.0, 10.0)),  # filtre sans effet : chemin de l'index de voisins
+    ]
+    return [Query(row, *keys[row % len(keys)]) for row in range(0, N_FILMS, 3)]
+
+
+def assert_same_ranking(ids, scores, expected_ids, expected_scores):
+    """Same scores; films with equal scores may come in any order."""
+    assert len(ids) == len(expected_ids)
+    np.testing.assert_allclose(scores, expected_scores, rtol=0, atol=1e-6)
+    if len(ids):
+        above = expected_scores > expected_scores[-1] + 1e-6
+        assert set(ids[above]) == set(expected_ids[above])
+
+
+@pytest.mark.parametrize("k", [K // 2, 3 * K])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_matches_one_query_at_a_time(engine, k, workers):
+    batch = queries(engine)
+    results = list(engine.recommend_batch(batch, k, batch_size=5, workers=workers))
+    assert [query for query, _, _ in results] == batch
+    for query, ids, scores in results:
+        expected_ids, expected_scores = engine.recommend(query.row, k, query.genres, query.studios,
+                                                         query.rating_range)
+        assert query.row not in ids
+        assert (ids >= 0).all()
+        mask = engine.mask(query.genres, query.studios, query.rating_range)
+        assert mask[ids].all()
+        assert_same_ranking(ids, scores, expected_ids, expected_scores)
+
+
+def test_unfiltered_queries_read_the_neighbour_index(engine):
+    engine = Engine(engine.features, engine.neighbors, engine.filters)
+    rows = np.arange(0, N_FILMS, 7)
+    for key in ((None, None, None), (None, None, (0.0, 10.0))):
+        ids, scores = engine.rank(key, rows, K)
+        np.testing.assert_array_equal(ids, engine.neighbors.neighbors[rows])
+        np.testing.assert_array_equal(scores, engine.neighbors.scores[rows])
+    # Aucun produit matriciel : le cache des candidats reste vide.
+    assert len(engine.candidate_cache) == 0
@@ -0,0 +1,70 @@
+"""Incremental artifact updates against a full build of the same catalog."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from cinema import artifacts, build, catalog, incremental, synthetic
+
+N_FILMS = 400
+N_APPENDED = 40
+K = 10
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    """Full ``ml`` source frame; the catalog on disk holds its first rows only."""
+    monkeypatch.chdir(tmp_path)
+    paths = synthetic.write_catalogs(catalog.DATA_DIR, N_FILMS, seed=2)
+    full = pd.read_csv(paths["ml"])
+    full.iloc[:-N_APPENDED].to_csv(paths["ml"], index=False)
+    return paths["ml"], full
+
+
+def assert_same_top_k(actual, expected, features):
+    """Same scores, and neighbours that really have them; films with equal scores may come in any order."""
+    np.testing.assert_allclose(actual.scores, expected.scores, rtol=0, atol=1e-6)
+    similarity = (features @ features.T).toarray()
+    np.fill_diagonal(similarity, -np.inf)
+    for index in (actual, expected):
+        valid = index.neighbors >= 0
+        rows = np.nonzero(valid)[0]
+        np.testing.assert_allclose(similarity[rows, index.neighbors[valid]], index.scores[valid], atol=1e-6)
+    np.testing.assert_array_equal(actual.neighbors >= 0, expected.neighbors >= 0)
+    # Au-dessus du K-ième score, pas d'ex æquo en jeu : mêmes films.
+    for row in range(len(expected.scores)):
+        cut = expected.scores[row, -1]
+        above = expected.scores[row] > cut + 1e-6
+        assert set(actual.neighbors[row, above]) == set(expected.neighbors[row, above])
+
+
+def test_appended_films_match_a_full_build(source, tmp_path):
+    path, full = source
+    incremental_root = str(tmp_path / "incremental")
+    build.build("ml", k=K, root=incremental_root)
+
+    full.to_csv(path, index=False)
+    version = incremental.update("ml", max_new_terms=10**6, root=incremental_root)
+    assert version == "v0002"
+    assert incremental.update("ml", root=incremental_root) is None
+
+    full_root = str(tmp_path / "full")
+    build.build("ml", k=K, root=full_root)
+    updated = artifacts.load("ml", root=incremental_root)
+    rebuilt = artifacts.load("ml", root=full_root)
+    assert updated.manifest["n_rows"] == rebuilt.manifest["n_rows"] == len(catalog.load("ml"))
+    assert updated.manifest["incremental_from"] == "v0001"
+    assert_same_top_k(updated.neighbors, rebuilt.neighbors, rebuilt.features)
+
+
+def test_changed_existing_row_requires_a_rebuild(source, tmp_path):
+    path, full = source
+    root = str(tmp_path / "artifacts")
+    with pytest.raises(incremental.RebuildRequired):
+        incremental.update("ml", root=root)
+
+    build.build("ml", k=K, root=root)
+    changed = full.copy()
+    changed.loc[3, "title"] = "Un tout autre titre"
+    changed.to_csv(path, index=False)
+    with pytest.raises(incremental.RebuildRequired):
+        incremental.update("ml", root=root)
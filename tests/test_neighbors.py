@@ -0,0 +1,50 @@
+"""Blockwise top-K neighbour index against a dense cosine similarity."""
+import numpy as np
+from scipy import sparse
+from sklearn.metrics.pairwise import cosine_similarity
+
+from cinema.neighbors import block_top_k, build_neighbor_index, normalize_features
+
+K = 5
+
+
+def counts(n_rows=60, n_columns=40, seed=0):
+    """Random counts with continuous weights: no two scores tie."""
+    rng = np.random.default_rng(seed)
+    matrix = sparse.random(n_rows, n_columns, density=0.3, format="csr", random_state=rng,
+                           data_rvs=lambda size: rng.uniform(0.5, 3.0, size))
+    # Un terme de plus par ligne : aucune ligne vide.
+    extra = sparse.csr_matrix((np.ones(n_rows), (np.arange(n_rows), rng.integers(n_columns, size=n_rows))),
+                              shape=matrix.shape)
+    return (matrix + extra).tocsr()
+
+
+def dense_top_k(matrix, k):
+    similarity = cosine_similarity(matrix)
+    np.fill_diagonal(similarity, -np.inf)
+    ids = np.argsort(-similarity, axis=1, kind="stable")[:, :k]
+    return ids, np.take_along_axis(similarity, ids, axis=1)
+
+
+def test_blocks_and_workers_match_a_dense_similarity():
+    matrix = counts()
+    expected_ids, expected_scores = dense_top_k(matrix, K)
+    assert (expected_scores[:, -1] > 0).all()
+    for options in ({"workers": 1}, {"workers": 3, "block_size": 7}):
+        index = build_neighbor_index(matrix, k=K, **options)
+        assert index.k == K
+        np.testing.assert_array_equal(index.neighbors, expected_ids)
+        np.testing.assert_allclose(index.scores, expected_scores, atol=1e-6)
+
+
+def test_k_is_capped_and_missing_neighbours_are_padded():
+    matrix = counts(n_rows=4)
+    assert build_neighbor_index(matrix, k=K).k == 3
+
+    features = normalize_features(matrix)
+    ids, scores = block_top_k(features, 0, 4, 4)
+    expected_ids, expected_scores = dense_top_k(matrix, 3)
+    np.testing.assert_array_equal(ids[:, :3], expected_ids)
+    np.testing.assert_allclose(scores[:, :3], expected_scores, atol=1e-6)
+    # Le film lui-même n'est jamais voisin : la 4e place reste vide.
+    assert (ids[:, 3] == -1).all() and (scores[:, 3] == 0).all()
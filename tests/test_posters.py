@@ -0,0 +1,150 @@
+"""PosterCache and Prefetcher, with stand-in fetchers and a local HTTP server."""
+import functools
+import http.server
+import io
+import os
+import threading
+
+import pytest
+from PIL import Image
+
+from cinema.posters import HttpFetcher, PosterCache, Prefetcher
+
+
+def jpeg(width=600, height=900):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+class GatedFetcher:
+    """Serves one JPEG per call, blocking until ``gate`` is set; records every call."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, poster_path):
+        with self._lock:
+            self.calls.append(poster_path)
+        self.started.set()
+        self.gate.wait(5)
+        return jpeg()
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "posters")
+
+
+def test_concurrent_gets_share_one_download(cache_dir):
+    fetcher = GatedFetcher()
+    cache = PosterCache(cache_dir=cache_dir, fetcher=fetcher, url_prefix="local")
+    with Prefetcher(cache, max_workers=2) as prefetcher:
+        assert prefetcher.warm("session", ["/a.jpg"]) == 1
+        fetcher.started.wait(5)
+        assert cache.pending("/a.jpg")
+        result = {}
+        render = threading.Thread(target=lambda: result.setdefault("path", cache.get("/a.jpg")))
+        render.start()
+        fetcher.gate.set()
+        render.join(5)
+    assert fetcher.calls == ["/a.jpg"]
+    assert result["path"] == os.path.join(cache_dir, cache.filename("/a.jpg"))
+    assert cache.stats()["fetched"] == 1
+    assert cache.nbytes == os.path.getsize(result["path"])
+
+
+def test_prefetch_does_not_count_as_page_hits(cache_dir):
+    fetcher = GatedFetcher()
+    fetcher.gate.set()
+    cache = PosterCache(cache_dir=cache_dir, fetcher=fetcher, url_prefix="local")
+    with Prefetcher(cache, max_workers=1) as prefetcher:
+        prefetcher.warm("session", ["/a.jpg", "/b.jpg"])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["fetched"]) == (0, 0, 2)
+    assert cache.urls(["/a.jpg", "/b.jpg"]) == [f"local/{cache.filename(p)}" for p in ("/a.jpg", "/b.jpg")]
+    assert cache.stats()["hit_rate"] == 1.0
+
+
+def test_warm_cancels_the_previous_call_of_the_group(cache_dir):
+    fetcher = GatedFetcher()
+    cache = PosterCache(cache_dir=cache_dir, fetcher=fetcher, url_prefix="local")
+    with Prefetcher(cache, max_workers=1) as prefetcher:
+        assert prefetcher.warm("session", [f"/old{i}.jpg" for i in range(5)]) == 5
+        fetcher.started.wait(5)
+        # Nouveaux filtres : les 4 affiches encore en file sont abandonnées, celle en cours se termine.
+        assert prefetcher.warm("session", ["/new.jpg"]) == 1
+        assert prefetcher.stats()["cancelled"] == 4
+        # Un autre groupe (session) n'annule rien.
+        assert prefetcher.warm("other", ["/other.jpg"]) == 1
+        fetcher.gate.set()
+    assert sorted(fetcher.calls) == ["/new.jpg", "/old0.jpg", "/other.jpg"]
+
+
+def test_in_flight_cap(cache_dir):
+    fetcher = GatedFetcher()
+    cache = PosterCache(cache_dir=cache_dir, fetcher=fetcher, url_prefix="local")
+    with Prefetcher(cache, max_workers=2, max_in_flight=3) as prefetcher:
+        assert prefetcher.warm("session", [f"/p{i}.jpg" for i in range(10)]) == 3
+        stats = prefetcher.stats()
+        assert (stats["in_flight"], stats["skipped"]) == (3, 7)
+        fetcher.gate.set()
+    assert prefetcher.stats()["in_flight"] == 0
+    assert len(fetcher.calls) == 3
+
+
+def test_http_stand_in(cache_dir, tmp_path):
+    source = tmp_path / "tmdb"
+    source.mkdir()
+    for name in ("a", "b"):
+        (source / f"{name}.jpg").write_bytes(jpeg())
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(source))
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        cache = PosterCache(cache_dir=cache_dir, fetcher=HttpFetcher(f"http://127.0.0.1:{server.server_port}"),
+                            url_prefix="local")
+        with Prefetcher(cache, max_workers=2) as prefetcher:
+            assert prefetcher.warm("session", ["/a.jpg", "/b.jpg", "/missing.jpg"]) == 3
+    finally:
+        server.shutdown()
+    assert cache.cached("/a.jpg") and cache.cached("/b.jpg")
+    assert not cache.cached("/missing.jpg")
+    assert (cache.stats()["fetched"], cache.stats()["errors"]) == (2, 1)
+    with Image.open(os.path.join(cache_dir, cache.filename("/a.jpg"))) as thumbnail:
+        assert thumbnail.width == cache.sizes["card"]
+
+
+def test_render_never_downloads(cache_dir):
+    fetcher = GatedFetcher()
+    cache = PosterCache(cache_dir=cache_dir, fetcher=fetcher, url_prefix="local")
+    assert cache.urls(["/a.jpg", ""]) == ["https://image.tmdb.org/t/p/w500/a.jpg", ""]
+    assert fetcher.calls == []
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 1)
+
+
+def test_failed_posters_are_not_retried_before_the_ttl(cache_dir):
+    calls = []
+    now = [0.0]
+
+    def failing(poster_path):
+        calls.append(poster_path)
+        raise OSError("unreachable")
+
+    cache = PosterCache(cache_dir=cache_dir, fetcher=failing, failure_ttl=60, clock=lambda: now[0])
+    assert cache.get("/a.jpg") is None
+    assert cache.get("/a.jpg") is None
+    assert cache.pending("/a.jpg")
+    with Prefetcher(cache, max_workers=1) as prefetcher:
+        assert prefetcher.fill(["/a.jpg"]) == 0
+    assert calls == ["/a.jpg"]
+
+    now[0] = 61.0
+    assert not cache.pending("/a.jpg")
+    assert cache.get("/a.jpg") is None
+    assert calls == ["/a.jpg", "/a.jpg"]
+    assert cache.stats()["errors"] == 2
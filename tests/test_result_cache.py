@@ -0,0 +1,83 @@
+"""ResultCache: LRU order, TTL, byte budget and counters."""
+import numpy as np
+import pytest
+
+from cinema.result_cache import ResultCache, filters_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ResultCache(max_entries=2, ttl=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" redevient le plus récent
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+    cache = ResultCache(ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+
+
+def test_byte_budget_evicts_the_oldest_values():
+    cache = ResultCache(ttl=None, max_bytes=100, sizeof=len)
+    cache.put("a", "x" * 40)
+    cache.put("b", "x" * 40)
+    assert cache.bytes == 80
+    cache.put("c", "x" * 40)
+    assert cache.get("a") is None
+    assert cache.bytes == 80 and len(cache) == 2
+    # Remplacer une valeur rend ses octets avant de compter les nouveaux.
+    cache.put("b", "x" * 10)
+    assert cache.bytes == 50
+
+
+def test_value_larger_than_the_budget_is_refused_without_flushing():
+    cache = ResultCache(ttl=None, max_bytes=100, sizeof=len)
+    cache.put("small", "x" * 30)
+    cache.put("huge", "x" * 101)
+    assert cache.get("huge") is None
+    assert cache.get("small") == "x" * 30
+    assert cache.stats()["bytes"] == 30 and cache.stats()["evictions"] == 1
+
+
+def test_counters_and_read_only_arrays():
+    cache = ResultCache(ttl=None)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(5)
+
+    first = cache.get_or_compute("key", compute)
+    second = cache.get_or_compute("key", compute)
+    assert second is first and len(calls) == 1
+    with pytest.raises(ValueError):
+        first[0] = 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert stats["bytes"] == first.nbytes
+    cache.clear()
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+def test_filters_key_ignores_the_selection_order():
+    assert filters_key(["Drama", "Action"], None, (0, 9.5)) == filters_key(["Action", "Drama"], [], [0.0, 9.5])
@@ -0,0 +1,56 @@
+"""Title index and lookups, built from the titles or memory-mapped from the artifacts."""
+import numpy as np
+import pandas as pd
+
+from cinema.lookup import Lookup
+from cinema.search import TitleIndex
+
+TITLES = ["Amélie", "Up", "Alien", "AMELIE", "Aliens", "Amélie", "Toy Story"]
+
+
+def saved(index, tmp_path):
+    """``index`` written as ``.npy`` files and loaded back memory-mapped, as by :mod:`cinema.artifacts`."""
+    arrays = {}
+    for key, array in index.arrays().items():
+        np.save(tmp_path / f"{key}.npy", array)
+        arrays[key] = np.load(tmp_path / f"{key}.npy", mmap_mode="r")
+    return TitleIndex.from_arrays(index.gram_names, arrays)
+
+
+def test_index_loaded_from_arrays_matches_the_built_one(tmp_path):
+    built = TitleIndex.from_titles(TITLES)
+    loaded = saved(built, tmp_path)
+    assert list(loaded.keys) == list(built.keys) == sorted(built.keys)
+    for query in ("", "a", "ali", "AMEL", "amelie", "alein", "story", "zz"):
+        rows, n_exact = loaded.prefix(query)
+        expected_rows, expected_exact = built.prefix(query)
+        assert rows.tolist() == expected_rows.tolist() and n_exact == expected_exact
+        assert loaded.suggest(query).tolist() == built.suggest(query).tolist()
+    assert loaded.exact("amelie").tolist() == [0, 3, 5]
+
+
+def test_lookup_prefers_the_exact_title_then_the_first_folded_match(tmp_path):
+    df = pd.DataFrame({
+        "tconst": [f"tt{i:07d}" for i in range(len(TITLES))],
+        "title": TITLES,
+        "startYear": np.arange(2000, 2000 + len(TITLES)),
+        "averageRating": np.full(len(TITLES), 7.0),
+        "poster_path_y": [""] * len(TITLES),
+    })
+    lookup = Lookup(df, saved(TitleIndex.from_titles(df["title"]), tmp_path))
+    assert lookup.row("AMELIE") == 3
+    assert lookup.row("Amélie") == 0
+    assert lookup.row("amélie") == 0
+    assert lookup.row("Alien") == 2
+    assert lookup.row("Predator") is None
+    assert lookup.row_by_tconst["tt0000004"] == 4
+    assert lookup.take([6, 1])["title"].tolist() == ["Toy Story", "Up"]
+
+
+def test_empty_query_returns_the_first_rows_of_the_order():
+    index = TitleIndex.from_titles(TITLES)
+    rank = np.array([3, 0, 6, 1, 5, 2, 4], dtype=np.int32)
+    order = np.argsort(rank).astype(np.int32)
+    for query in ("", "  "):
+        assert index.suggest(query, limit=4, rank=rank, order=order).tolist() == order[:4].tolist()
+        assert index.suggest(query, limit=4, rank=rank).tolist() == order[:4].tolist()